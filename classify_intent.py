@@ -1,16 +1,14 @@
+import sys
+
 import pandas as pd
 import numpy as np
 import re
 
+import quantile_sketch as qs
+
 input_file = "/home/ubuntu/cleaned_deduplicated_keywords.csv"
 output_file = "/home/ubuntu/keywords_with_intent.csv"
 
-print(f"Loading cleaned keywords from {input_file}")
-df = pd.read_csv(input_file)
-
-print(f"Shape of dataframe before intent classification: {df.shape}")
-print(f"Columns: {df.columns.tolist()}")
-
 # Define intent markers (case-insensitive)
 # These are examples and can be expanded significantly
 intent_markers = {
@@ -82,26 +80,53 @@ def classify_intent(keyword_str):
         
     return "informational" # General fallback
 
-# Check if 'search_intent' column already exists. If not, create it.
-if "search_intent" not in df.columns:
-    df["search_intent"] = df["keyword"].apply(classify_intent)
-    print("Created and populated \"search_intent\" column.")
-else:
-    # If it exists, fill NaN values or re-classify based on requirements
-    # For this task, we assume it's missing and we are creating it.
-    # If it exists and has values, we might only want to fill NaNs:
-    # df["search_intent"] = df["search_intent"].fillna(df["keyword"].apply(classify_intent))
-    # Or, if we need to re-classify all based on new rules:
-    df["search_intent"] = df["keyword"].apply(classify_intent)
-    print("Re-classified existing \"search_intent\" column.")
-
-print("Value counts for search_intent:")
-print(df["search_intent"].value_counts(dropna=False))
-
-print(f"Shape of dataframe after intent classification: {df.shape}")
-print(f"First 5 rows with search_intent:\n{df.head().to_string()}")
-
-# Save the dataframe with intent classification
-df.to_csv(output_file, index=False)
-print(f"Data with search intent saved to {output_file}")
+def add_search_intent(df, verbose=True):
+    log = print if verbose else (lambda *args, **kwargs: None)
+
+    # Check if 'search_intent' column already exists. If not, create it.
+    if "search_intent" not in df.columns:
+        df["search_intent"] = df["keyword"].apply(classify_intent)
+        log("Created and populated \"search_intent\" column.")
+    else:
+        # If it exists, fill NaN values or re-classify based on requirements
+        # For this task, we assume it's missing and we are creating it.
+        # If it exists and has values, we might only want to fill NaNs:
+        # df["search_intent"] = df["search_intent"].fillna(df["keyword"].apply(classify_intent))
+        # Or, if we need to re-classify all based on new rules:
+        df["search_intent"] = df["keyword"].apply(classify_intent)
+        log("Re-classified existing \"search_intent\" column.")
+    return df
+
+
+if __name__ == "__main__":
+    # Optional overrides: python classify_intent.py [input_file] [output_file]
+    if len(sys.argv) > 1:
+        input_file = sys.argv[1]
+    if len(sys.argv) > 2:
+        output_file = sys.argv[2]
+
+    print(f"Loading cleaned keywords from {input_file}")
+    df = pd.read_csv(input_file)
+
+    print(f"Shape of dataframe before intent classification: {df.shape}")
+    print(f"Columns: {df.columns.tolist()}")
+
+    df = add_search_intent(df)
+
+    print("Value counts for search_intent:")
+    print(df["search_intent"].value_counts(dropna=False))
+
+    print(f"Shape of dataframe after intent classification: {df.shape}")
+    print(f"First 5 rows with search_intent:\n{df.head().to_string()}")
+
+    # Classification keeps every row, so the clean step's quantile sketches still apply
+    sketches = qs.load_sketches(input_file)
+    if sketches is not None:
+        qs.save_sketches(output_file, sketches)
+    else:
+        # Don't leave an older run's sidecar next to the new output
+        qs.remove_sketches(output_file)
 
+    # Save the dataframe with intent classification
+    df.to_csv(output_file, index=False)
+    print(f"Data with search intent saved to {output_file}")
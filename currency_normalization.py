@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Unit normalization at ingest. Percent fields ("26%", "-50%", "∞", " --") are parsed into
+# fractions with vectorized string ops, and CPC columns are converted into one reporting
+# currency from a local dated FX table (fx_rates.csv: date, currency, units_per_usd). The
+# conversion goes through categorical currency codes: one factor per currency, then a single
+# array lookup per row instead of a row-wise apply. After conversion `currency` names the
+# currency the CPCs are in and the export's original currency is kept as `source_currency`.
+
+FX_FILE = "fx_rates.csv"
+REPORTING_CURRENCY = "CAD"
+
+PERCENT_COLUMNS = ['three_month_change', 'yoy_change']
+CPC_COLUMNS = ['cpc_low', 'cpc_high', 'cpc']
+
+
+def parse_percent(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    text = (series.astype(str).str.strip()
+            .str.replace('%', '', regex=False)
+            .str.replace(',', '', regex=False)
+            .str.replace('∞', 'inf', regex=False))
+    return pd.to_numeric(text, errors='coerce') / 100
+
+
+def load_fx_table(path=FX_FILE):
+    fx_table = pd.read_csv(path, parse_dates=['date'])
+    fx_table['currency'] = fx_table['currency'].str.upper().str.strip()
+    return fx_table
+
+
+def fx_rates(fx_table, as_of=None):
+    # units_per_usd per currency from the latest row on or before as_of (latest overall if None);
+    # currencies that only have later rows fall back to their earliest rate
+    table = fx_table.sort_values('date')
+    if as_of is not None:
+        on_or_before = table[table['date'] <= pd.Timestamp(as_of)]
+        later_only = table[~table['currency'].isin(on_or_before['currency'])].drop_duplicates('currency', keep='first')
+        table = pd.concat([on_or_before, later_only])
+    return table.groupby('currency')['units_per_usd'].last()
+
+
+def _currency_codes(currencies):
+    # Missing currencies get code -1
+    return pd.factorize(pd.Series(currencies).str.upper().str.strip())
+
+
+def unknown_currencies(currencies, rates):
+    _, categories = _currency_codes(currencies)
+    return sorted(set(categories) - set(rates.index))
+
+
+def conversion_factors(currencies, rates, target):
+    # Per-row factor to convert from each row's currency into target (NaN for unknown currencies)
+    codes, categories = _currency_codes(currencies)
+    per_category = rates.get(target, np.nan) / rates.reindex(categories).to_numpy(dtype=float)
+    factors = per_category[codes]
+    factors[codes < 0] = np.nan
+    return factors
+
+
+def normalize_units(df, fx_table=None, reporting_currency=REPORTING_CURRENCY, as_of=None):
+    df = df.copy()
+    for col in PERCENT_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_percent(df[col])
+
+    if fx_table is not None and 'currency' in df.columns:
+        rates = fx_rates(fx_table, as_of)
+        if reporting_currency not in rates.index:
+            raise ValueError(f"No FX rate for reporting currency {reporting_currency}")
+        # Converting would silently turn these rows' CPCs into NaN
+        unknown = unknown_currencies(df['currency'], rates)
+        if unknown:
+            raise ValueError(f"No FX rate for currencies {', '.join(unknown)}; add them to the FX table")
+        cpc_columns = [col for col in CPC_COLUMNS if col in df.columns]
+        if df['currency'].isna().any() and df.loc[df['currency'].isna(), cpc_columns].notna().any(axis=None):
+            raise ValueError("Rows with a CPC but no currency can't be converted")
+
+        factors = conversion_factors(df['currency'], rates, reporting_currency)
+        for col in cpc_columns:
+            df[col] = df[col].to_numpy(dtype=float) * factors
+        df.insert(df.columns.get_loc('currency') + 1, 'source_currency', df['currency'])
+        df['currency'] = reporting_currency
+    return df
+
+
+class CurrencyScaler:
+    # Re-expresses a loaded frame's CPC columns in another currency from cached arrays
+    def __init__(self, df, rates):
+        self.source_currencies = df['currency']
+        self.rates = rates
+        self.native = {col: df[col].to_numpy(dtype=float) for col in CPC_COLUMNS if col in df.columns}
+
+    def currencies(self):
+        return list(self.rates.index)
+
+    def native_currency(self):
+        currencies = pd.unique(self.source_currencies.dropna())
+        return currencies[0] if len(currencies) == 1 else None
+
+    def rescale(self, df, target):
+        factors = conversion_factors(self.source_currencies, self.rates, target)
+        df = df.copy()
+        for col, values in self.native.items():
+            df[col] = values * factors
+        if 'value_score' in df.columns:
+            df['value_score'] = df['avg_monthly_searches'] * df['cpc']
+        df['currency'] = target
+        return df
+
+
+def load_currency_scaler(df, path=FX_FILE):
+    # None when there is no local FX table
+    if not os.path.exists(path):
+        return None
+    return CurrencyScaler(df, fx_rates(load_fx_table(path)))
@@ -0,0 +1,78 @@
+import os
+import threading
+
+import keyword_analytics as ka
+
+# Background hot reload of the keyword dataset. A daemon thread polls the file's mtime/size;
+# when it changes (and has stopped changing for one poll, so a half-written CSV is not picked
+# up) the new frame and cube are built off the request path and swapped in with a single
+# reference assignment. Readers take current() once per rerun/request and keep that version.
+
+
+class DatasetWatcher:
+    def __init__(self, path=ka.DATA_FILE, interval=2.0, loader=ka.load_dataset):
+        self.path = path
+        self.interval = interval
+        self.loader = loader
+        self._stat = self._file_stat()
+        self._pending_stat = None
+        self._dataset = loader(path)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _file_stat(self):
+        # Covers the per-shard files too when the dataset is stored as shards
+        try:
+            stats = [os.stat(file) for file in ka.dataset_files(self.path)]
+        except FileNotFoundError:
+            return None
+        if not stats:
+            return None
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
+
+    def current(self):
+        return self._dataset
+
+    def check(self):
+        # One poll; returns True when a new version was swapped in
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            self._pending_stat = None
+            return False
+        if stat != self._pending_stat:
+            # Changed since the last poll: wait one more interval for the writer to finish
+            self._pending_stat = stat
+            return False
+
+        self._stat = stat
+        self._pending_stat = None
+        try:
+            dataset = self.loader(self.path)
+        except Exception as e:
+            # Keep serving the old version until the file changes again
+            print(f"Reload of {self.path} failed, keeping version {self._dataset.version}: {e}")
+            return False
+
+        if dataset.version == self._dataset.version:
+            # Touched but identical content (same hash)
+            return False
+        self._dataset = dataset
+        print(f"Reloaded {self.path}: version {dataset.version}, {len(dataset.df)} keywords")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='dataset-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
@@ -0,0 +1,249 @@
+import argparse
+import base64
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+import kaleido
+from choreographer.browsers import Chromium
+from choreographer.errors import ChromeNotFoundError
+
+import keyword_analytics as ka
+
+# Headless batch reports: renders the dashboard's summary, intent table, term clusters,
+# top-20 table and charts for many filter presets in one run.
+#
+# A presets file is a JSON list of objects like:
+#   {"name": "transactional-low-cpc", "intent": "transactional", "cpc_range": [0, 10],
+#    "volume_range": [100, 100000], "competition_range": [0, 50], "keyword_contains": "studio"}
+# Every key except "name" is optional and defaults to the unfiltered dashboard view.
+
+PRESET_KEYS = ['intent', 'volume_range', 'cpc_range', 'competition_range', 'keyword_contains']
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+    body {{ font-family: sans-serif; margin: 2rem; color: #212121; }}
+    h1 {{ color: #1E88E5; }}
+    h2 {{ color: #0D47A1; margin-top: 2rem; }}
+    table {{ border-collapse: collapse; margin-bottom: 1rem; }}
+    th, td {{ border: 1px solid #e0e0e0; padding: 0.3rem 0.6rem; text-align: right; }}
+    th {{ background-color: #f0f2f6; }}
+    .metrics td {{ font-size: 1.4rem; font-weight: bold; color: #1E88E5; }}
+    .filters {{ background-color: #e3f2fd; padding: 0.5rem; border-radius: 5px; }}
+    img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div class="filters">{filters}</div>
+<p>Showing {shown:,} of {total:,} keywords ({share:.1f}%)</p>
+<h2>Summary Metrics</h2>
+{metrics}
+<h2>Intent Breakdown</h2>
+{intent_summary}
+<h2>Visual Charts</h2>
+{charts}
+<h2>Top 20 High-Value Keywords</h2>
+{top_keywords}
+</body>
+</html>
+"""
+
+# Set per worker process by _init_worker so the dataset is only shipped once per process
+_worker_df = None
+
+
+def _init_worker(df, render_images):
+    global _worker_df
+    _worker_df = df
+    if render_images:
+        # Shut down when the pool winds the worker down
+        start_image_server()
+        Finalize(None, kaleido.stop_sync_server, kwargs={'silence_warnings': True}, exitpriority=10)
+
+
+def check_chrome():
+    # kaleido's sync server thread swallows a missing browser and then blocks every
+    # fig.to_image call forever, so look for Chrome before starting it
+    if Chromium.find_browser(skip_local=False) is None:
+        raise ChromeNotFoundError("HTML reports need Chrome for chart images; install it with kaleido_get_chrome "
+                                  "or use --formats csv,xlsx")
+
+
+def start_image_server():
+    # One Chrome for all of this process's charts instead of one per fig.to_image call
+    kaleido.start_sync_server(silence_warnings=True)
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', str(name).lower()).strip('-') or 'report'
+
+
+def assign_slugs(presets):
+    # File name stem per preset; names that slugify alike ("CPC < 10", "CPC > 10") get -2, -3, ...
+    # instead of overwriting each other's reports
+    taken = set()
+    for preset in presets:
+        base = preset.get('slug') or slugify(preset['name'])
+        slug, suffix = base, 2
+        while slug in taken:
+            slug, suffix = f'{base}-{suffix}', suffix + 1
+        preset['slug'] = slug
+        taken.add(slug)
+    return presets
+
+
+def default_presets(df):
+    # One report for the full dataset plus one per intent
+    presets = [{'name': 'all'}]
+    for intent in ka.filter_options(df)['intents']:
+        presets.append({'name': intent, 'intent': intent})
+    return presets
+
+
+def load_presets(path):
+    with open(path) as f:
+        presets = json.load(f)
+    for i, preset in enumerate(presets):
+        preset.setdefault('name', f'preset-{i + 1}')
+    return assign_slugs(presets)
+
+
+def preset_filters(preset):
+    filters = {key: preset[key] for key in PRESET_KEYS if preset.get(key) is not None}
+    for key in ('volume_range', 'cpc_range', 'competition_range'):
+        if key in filters:
+            filters[key] = tuple(filters[key])
+    return filters
+
+
+def figure_to_img_tag(fig):
+    png = fig.to_image(format='png', width=1000, height=550)
+    return '<img src="data:image/png;base64,{}">'.format(base64.b64encode(png).decode())
+
+
+def render_html(preset, filtered_df, total):
+    filters = preset_filters(preset)
+    metrics = ka.summary_metrics(filtered_df)
+    metrics_html = (
+        '<table class="metrics"><tr><th>Total Keywords</th><th>Avg. Monthly Searches</th>'
+        '<th>Avg. CPC</th><th>Avg. Competition Score</th></tr>'
+        '<tr><td>{:,}</td><td>{:,.1f}</td><td>${:,.2f}</td><td>{:,.1f}</td></tr></table>'
+    ).format(metrics['total_keywords'], metrics['avg_volume'], metrics['avg_cpc'], metrics['avg_competition'])
+
+    intent_summary = ka.intent_summary(filtered_df).style.format({
+        'Avg. Monthly Searches': '{:,.1f}',
+        'Avg. CPC': '${:,.2f}',
+        'Avg. Competition': '{:,.1f}'
+    }).hide(axis='index').to_html()
+
+    top_keywords = ka.top_keywords(filtered_df, 20)[ka.TOP_KEYWORD_COLUMNS].style.format({
+        'avg_monthly_searches': '{:,.0f}',
+        'cpc': '${:,.2f}',
+        'competition_score': '{:,.1f}',
+        'value_score': '{:,.0f}'
+    }).hide(axis='index').to_html()
+
+    charts = ''
+    if len(filtered_df):
+        charts = '\n'.join([
+            figure_to_img_tag(ka.volume_by_intent_figure(ka.intent_volume(filtered_df))),
+            figure_to_img_tag(ka.cpc_vs_volume_figure(filtered_df)),
+            figure_to_img_tag(ka.term_clusters_figure(ka.term_clusters(filtered_df))),
+        ])
+
+    filter_text = ', '.join(f'{key}: {value}' for key, value in filters.items()) or 'No filters (all keywords)'
+
+    return HTML_TEMPLATE.format(
+        title=html.escape(f"VFX Keyword Report: {preset['name']}"),
+        filters=html.escape(filter_text),
+        shown=len(filtered_df),
+        total=total,
+        share=len(filtered_df) / total * 100 if total else 0.0,
+        metrics=metrics_html,
+        intent_summary=intent_summary,
+        charts=charts,
+        top_keywords=top_keywords
+    )
+
+
+def render_report(preset, output_dir, formats, df=None):
+    df = _worker_df if df is None else df
+    filtered_df = ka.filter_keywords(df, **preset_filters(preset))
+    base_path = os.path.join(output_dir, preset.get('slug') or slugify(preset['name']))
+
+    written = []
+    if 'html' in formats:
+        # Render fully before opening the file so a failed render leaves no empty report
+        report_html = render_html(preset, filtered_df, len(df))
+        with open(base_path + '.html', 'w', encoding='utf-8') as f:
+            f.write(report_html)
+        written.append(base_path + '.html')
+    if 'csv' in formats:
+        filtered_df.to_csv(base_path + '.csv', index=False)
+        written.append(base_path + '.csv')
+    if 'xlsx' in formats:
+        with open(base_path + '.xlsx', 'wb') as f:
+            f.write(ka.to_excel(filtered_df))
+        written.append(base_path + '.xlsx')
+    return preset['name'], len(filtered_df), written
+
+
+def generate_reports(df, presets, output_dir, formats=('html', 'csv', 'xlsx'), workers=None):
+    os.makedirs(output_dir, exist_ok=True)
+    presets = assign_slugs([dict(preset) for preset in presets])
+    render_images = 'html' in formats
+    if render_images:
+        check_chrome()
+    if workers == 1:
+        if render_images:
+            start_image_server()
+        try:
+            return [render_report(preset, output_dir, formats, df=df) for preset in presets]
+        finally:
+            if render_images:
+                kaleido.stop_sync_server(silence_warnings=True)
+
+    # The prepared frame (with its precomputed term/value columns) goes to each worker once
+    chunksize = max(1, len(presets) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df, render_images)) as executor:
+        return list(executor.map(render_report, presets, [output_dir] * len(presets),
+                                 [formats] * len(presets), chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render static keyword reports for a set of filter presets.")
+    parser.add_argument('--data', default=ka.DATA_FILE, help="Keyword CSV with search intent (default: %(default)s)")
+    parser.add_argument('--presets', help="JSON file with a list of filter presets (default: all + one per intent)")
+    parser.add_argument('--output-dir', default='reports', help="Directory for the rendered reports (default: %(default)s)")
+    parser.add_argument('--formats', default='html,csv,xlsx', help="Comma separated list of html, csv, xlsx (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    formats = tuple(fmt.strip() for fmt in args.formats.split(',') if fmt.strip())
+    unknown = set(formats) - {'html', 'csv', 'xlsx'}
+    if unknown:
+        parser.error(f"Unknown formats: {', '.join(sorted(unknown))}")
+
+    start = time.time()
+    print(f"Loading keywords from {args.data}")
+    df = ka.load_keywords(args.data)
+    presets = load_presets(args.presets) if args.presets else default_presets(df)
+    print(f"Rendering {len(presets)} reports to {args.output_dir}")
+
+    results = generate_reports(df, presets, args.output_dir, formats, args.workers)
+    for name, count, written in results:
+        print(f"  {name}: {count} keywords -> {', '.join(written)}")
+    print(f"Done in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import glob
+import hashlib
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+import plotly.express as px
+
+import keyword_cube as kc
+import quantile_sketch as qs
+
+# Shared keyword analytics used by the Streamlit dashboard and the batch report generator.
+# Everything in here is plain pandas/plotly so it can run without a Streamlit session.
+
+DATA_FILE = "keywords_with_intent.csv"
+
+# Words dropped when building the term clusters
+COMMON_WORDS = ['and', 'the', 'for', 'with', 'in', 'on', 'of', 'to', 'a']
+
+TOP_KEYWORD_COLUMNS = ['keyword', 'search_intent', 'avg_monthly_searches', 'cpc', 'competition_score', 'value_score']
+TABLE_COLUMNS = ['keyword', 'search_intent', 'avg_monthly_searches', 'cpc', 'competition_score', 'competition_text']
+
+# Sorting options for the keyword data table: label -> (column, ascending)
+SORT_OPTIONS = {
+    'Keyword (A-Z)': ('keyword', False),
+    'Keyword (Z-A)': ('keyword', True),
+    'Highest Search Volume': ('avg_monthly_searches', True),
+    'Lowest Search Volume': ('avg_monthly_searches', False),
+    'Highest CPC': ('cpc', True),
+    'Lowest CPC': ('cpc', False),
+    'Highest Competition': ('competition_score', True),
+    'Lowest Competition': ('competition_score', False)
+}
+
+
+def extract_main_terms(keyword):
+    # Remove common words and keep main terms
+    terms = keyword.lower().split()
+    return ' '.join([term for term in terms if term not in COMMON_WORDS and len(term) > 2])
+
+
+def prepare_keywords(df):
+    # Precompute the per-row columns every view needs so filters only have to slice them
+    df = df.copy()
+    df['main_terms'] = df['keyword'].astype(str).map(extract_main_terms)
+    df['value_score'] = df['avg_monthly_searches'] * df['cpc']
+    if 'semantic_cluster' in df.columns:
+        # Written by keyword_clusters.py; CSV drops the categorical dtype
+        df['semantic_cluster'] = df['semantic_cluster'].astype('category')
+    return df
+
+
+def shard_path(path, shard, n_shards):
+    # keywords_with_intent.csv -> keywords_with_intent.shard-003-of-008.csv
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard:03d}-of-{n_shards:03d}{ext}"
+
+
+def shard_files(path):
+    # Every per-shard file written next to path by pipeline.py, whatever its shard count
+    root, ext = os.path.splitext(path)
+    return sorted(glob.glob(glob.escape(root) + '.shard-*-of-*' + ext))
+
+
+def _newest_mtime(files):
+    return max(os.path.getmtime(file) for file in files)
+
+
+def dataset_files(path):
+    # The newest of the merged file and the per-shard file sets written by pipeline.py, so a
+    # --no-merge run takes over from an older merged file and vice versa
+    ext = os.path.splitext(path)[1]
+    candidates = [[path]] if os.path.exists(path) else []
+    shard_sets = {}
+    for file in shard_files(path):
+        n_shards = file[:-len(ext) or None].rsplit('-of-', 1)[1]
+        shard_sets.setdefault(n_shards, []).append(file)
+    # Leftovers from a run with a different shard count are ignored the same way
+    candidates.extend(sorted(files) for files in shard_sets.values())
+    if not candidates:
+        return []
+    return max(candidates, key=_newest_mtime)
+
+
+def _read_csvs(paths):
+    if not paths:
+        raise FileNotFoundError("No keyword data file or shards found")
+    if len(paths) == 1:
+        return pd.read_csv(paths[0])
+    with ThreadPoolExecutor() as executor:
+        return pd.concat(list(executor.map(pd.read_csv, paths)), ignore_index=True)
+
+
+def load_keywords(path=DATA_FILE):
+    return prepare_keywords(_read_csvs(dataset_files(path)))
+
+
+# A loaded dataset with its precomputed cube and quantile sketches; version is a content hash
+# of the source file(s)
+KeywordDataset = namedtuple('KeywordDataset', ['df', 'cube', 'sketches', 'version', 'path'])
+
+
+def load_dataset_sketches(path, df):
+    # Sidecar sketches from the clean step (merged across shards), else one pass over df; a
+    # sidecar left behind by a writer that replaced the CSV without it is rebuilt too
+    files = dataset_files(path)
+    sketch_sets = [qs.load_sketches(file) for file in files]
+    if files and all(sketches is not None for sketches in sketch_sets):
+        sketches = qs.merge_sketches(sketch_sets)
+        if qs.sketches_match(sketches, df):
+            return sketches
+    return qs.build_sketches(df)
+
+
+def load_dataset(path=DATA_FILE):
+    files = dataset_files(path)
+    digest = hashlib.sha1()
+    contents = []
+    for file in files:
+        with open(file, 'rb') as f:
+            contents.append(BytesIO(f.read()))
+        digest.update(contents[-1].getbuffer())
+    df = prepare_keywords(_read_csvs(contents))
+    return KeywordDataset(df, kc.build_cube(df), load_dataset_sketches(path, df), digest.hexdigest()[:16], path)
+
+
+def filter_options(df):
+    # Defaults for the sidebar widgets / report presets, taken from the full dataset
+    return {
+        'intents': sorted(df['search_intent'].unique().tolist()),
+        'volume_range': (int(df['avg_monthly_searches'].min()), int(df['avg_monthly_searches'].max())),
+        'cpc_range': (float(df['cpc'].min()), float(df['cpc'].max())),
+        'competition_range': (float(df['competition_score'].min()), float(df['competition_score'].max())),
+    }
+
+
+def _in_range(series, value_range):
+    # A missing range keeps every non-null value, same as a slider left at its full span
+    if value_range is None:
+        return series.notna()
+    return (series >= value_range[0]) & (series <= value_range[1])
+
+
+def filter_keywords(df, intent='All', volume_range=None, cpc_range=None, competition_range=None,
+                    keyword_contains='', regex=True):
+    mask = (
+        _in_range(df['avg_monthly_searches'], volume_range) &
+        _in_range(df['cpc'], cpc_range) &
+        _in_range(df['competition_score'], competition_range)
+    )
+
+    if intent and intent != 'All':
+        mask &= df['search_intent'] == intent
+
+    if keyword_contains:
+        mask &= df['keyword'].str.contains(keyword_contains, case=False, regex=regex, na=False)
+
+    return df[mask]
+
+
+def summary_metrics(filtered_df):
+    return {
+        'total_keywords': len(filtered_df),
+        'avg_volume': filtered_df['avg_monthly_searches'].mean(),
+        'avg_cpc': filtered_df['cpc'].mean(),
+        'avg_competition': filtered_df['competition_score'].mean(),
+    }
+
+
+def intent_summary(filtered_df):
+    intent_counts = filtered_df['search_intent'].value_counts().reset_index()
+    intent_counts.columns = ['Intent', 'Count']
+
+    # Intent metrics by row
+    intent_metrics = filtered_df.groupby('search_intent').agg({
+        'avg_monthly_searches': 'mean',
+        'cpc': 'mean',
+        'competition_score': 'mean'
+    }).reset_index()
+
+    intent_metrics.columns = ['Intent', 'Avg. Monthly Searches', 'Avg. CPC', 'Avg. Competition']
+
+    return pd.merge(intent_counts, intent_metrics, on='Intent')
+
+
+def intent_volume(filtered_df):
+    return filtered_df.groupby('search_intent')['avg_monthly_searches'].sum().reset_index()
+
+
+def term_clusters(filtered_df, n=20):
+    # Get the most common terms
+    all_terms = ' '.join(filtered_df['main_terms']).split()
+    term_counts = pd.Series(all_terms, dtype=object).value_counts().head(n)
+    return pd.DataFrame({'term': term_counts.index, 'count': term_counts.values})
+
+
+def semantic_cluster_summary(filtered_df):
+    # Aggregate volume/CPC per semantic cluster (needs the keyword_clusters.py column)
+    summary = filtered_df.groupby('semantic_cluster', observed=True).agg(
+        keywords=('keyword', 'size'),
+        total_monthly_searches=('avg_monthly_searches', 'sum'),
+        avg_cpc=('cpc', 'mean'),
+        avg_competition=('competition_score', 'mean')
+    ).reset_index()
+    return summary.sort_values('total_monthly_searches', ascending=False)
+
+
+def top_keywords(filtered_df, n=20):
+    return filtered_df.sort_values('value_score', ascending=False).head(n)
+
+
+def sort_keywords(filtered_df, sort_by):
+    sort_col, sort_ascending = SORT_OPTIONS[sort_by]
+    return filtered_df.sort_values(by=sort_col, ascending=sort_ascending)
+
+
+def volume_by_intent_figure(intent_volume_df):
+    return px.bar(
+        intent_volume_df,
+        x='search_intent',
+        y='avg_monthly_searches',
+        color='search_intent',
+        labels={'search_intent': 'Search Intent', 'avg_monthly_searches': 'Total Monthly Search Volume'},
+        title='Total Monthly Search Volume by Intent'
+    )
+
+
+def cpc_vs_volume_figure(filtered_df, currency='$'):
+    return px.scatter(
+        filtered_df,
+        x='avg_monthly_searches',
+        y='cpc',
+        color='competition_score',
+        size='avg_monthly_searches',
+        hover_name='keyword',
+        color_continuous_scale='Viridis',
+        labels={
+            'avg_monthly_searches': 'Average Monthly Searches',
+            'cpc': f'Cost Per Click ({currency})',
+            'competition_score': 'Competition Score'
+        },
+        title='CPC vs. Search Volume (colored by Competition Score)'
+    )
+
+
+def term_clusters_figure(term_df):
+    return px.treemap(
+        term_df,
+        path=['term'],
+        values='count',
+        color='count',
+        color_continuous_scale='RdBu',
+        title='Keyword Clusters by Common Terms'
+    )
+
+
+def sketch_histogram(sketch, bins=20):
+    # Histogram of a column from its quantile sketch, without touching the rows
+    edges, counts = sketch.histogram(bins)
+    labels = [f'{low:,.2f}' if edges[-1] < 100 else f'{low:,.0f}' for low in edges[:-1]]
+    return pd.DataFrame({'from': labels, 'keywords': counts.round()}).set_index('from')
+
+
+def semantic_clusters_figure(cluster_df, n=30):
+    return px.treemap(
+        cluster_df.head(n),
+        path=['semantic_cluster'],
+        values='total_monthly_searches',
+        color='avg_cpc',
+        color_continuous_scale='RdBu',
+        labels={'total_monthly_searches': 'Total Monthly Searches', 'avg_cpc': 'Avg. CPC'},
+        title='Semantic Keyword Clusters by Search Volume (colored by Avg. CPC)'
+    )
+
+
+def to_excel(df):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Keywords')
+    return output.getvalue()
@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+from collections import OrderedDict
+
+import numpy as np
+from aiohttp import web
+
+import keyword_analytics as ka
+import keyword_cube as kc
+from dataset_watcher import DatasetWatcher
+
+# Local read-only JSON API over the keyword dataset for other internal tools.
+#
+#   GET /version                  dataset version (content hash of the CSV)
+#   GET /keywords                 filtered keywords, paginated (limit/offset) or format=ndjson to stream all
+#   GET /top?k=20                 top-K filtered keywords by value score (volume * CPC)
+#   GET /intents                  per-intent counts and averages for the filtered keywords
+#
+# Filters (all optional): intent, contains, min_volume, max_volume, min_cpc, max_cpc,
+# min_competition, max_competition. Responses carry an ETag tied to the dataset version.
+
+RANGE_PARAMS = {
+    'volume_range': ('min_volume', 'max_volume'),
+    'cpc_range': ('min_cpc', 'max_cpc'),
+    'competition_range': ('min_competition', 'max_competition'),
+}
+
+RESPONSE_COLUMNS = ['keyword', 'search_intent', 'avg_monthly_searches', 'cpc_low', 'cpc_high', 'cpc',
+                    'competition_score', 'competition_text', 'currency', 'source_currency', 'value_score']
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+NDJSON_CHUNK_ROWS = 1000
+
+
+class LRUCache:
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+def _bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({'error': message}), content_type='application/json')
+
+
+def _float_param(params, name):
+    value = params.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise _bad_request(f"{name} must be a number")
+
+
+def _int_param(params, name, default, minimum=0, maximum=None):
+    value = _float_param(params, name)
+    if value is not None and not math.isfinite(value):
+        raise _bad_request(f"{name} must be a finite number")
+    value = default if value is None else int(value)
+    if value < minimum:
+        value = minimum
+    if maximum is not None and value > maximum:
+        value = maximum
+    return value
+
+
+def normalize_query(params):
+    # Canonical filter dict: equivalent query strings map to the same cache key
+    query = {}
+    intent = params.get('intent', '').strip().lower()
+    if intent and intent != 'all':
+        query['intent'] = intent
+    contains = params.get('contains', '').strip().lower()
+    if contains:
+        query['contains'] = contains
+    for low_name, high_name in RANGE_PARAMS.values():
+        for name in (low_name, high_name):
+            value = _float_param(params, name)
+            if value is not None:
+                query[name] = value
+    return query
+
+
+def query_filters(query):
+    # Translate a normalized query into keyword_analytics.filter_keywords arguments
+    filters = {'intent': query.get('intent', 'All'), 'keyword_contains': query.get('contains', ''), 'regex': False}
+    for range_name, (low_name, high_name) in RANGE_PARAMS.items():
+        if low_name in query or high_name in query:
+            filters[range_name] = (query.get(low_name, -np.inf), query.get(high_name, np.inf))
+    return filters
+
+
+def cache_key(endpoint, query, extra=()):
+    return endpoint + '?' + json.dumps([sorted(query.items()), list(extra)], separators=(',', ':'))
+
+
+def make_etag(version, key):
+    return '"{}-{}"'.format(version, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+
+def records_json(frame):
+    return frame[[col for col in RESPONSE_COLUMNS if col in frame.columns]].to_json(orient='records')
+
+
+def response_frame(dataset, filters):
+    filtered_df = ka.filter_keywords(dataset.df, **filters)
+    return filtered_df[[col for col in RESPONSE_COLUMNS if col in filtered_df.columns]]
+
+
+def keywords_body(dataset, filters, limit, offset):
+    filtered_df = ka.filter_keywords(dataset.df, **filters)
+    page = filtered_df.iloc[offset:offset + limit]
+    return '{{"version":"{}","total":{},"offset":{},"limit":{},"items":{}}}'.format(
+        dataset.version, len(filtered_df), offset, limit, records_json(page))
+
+
+def top_body(dataset, filters, k):
+    filtered_df = ka.filter_keywords(dataset.df, **filters)
+    top = filtered_df.nlargest(k, 'value_score')
+    return '{{"version":"{}","total":{},"k":{},"items":{}}}'.format(
+        dataset.version, len(filtered_df), k, records_json(top))
+
+
+def intents_body(dataset, filters):
+    # Answered from the cube whenever the range boundaries fall between buckets
+    cube_filters = {key: value for key, value in filters.items() if key != 'regex'}
+    view = dataset.cube.query(**cube_filters)
+    if view is not None:
+        summary = kc.intent_summary(view)
+    else:
+        summary = ka.intent_summary(ka.filter_keywords(dataset.df, **filters))
+    summary.columns = ['intent', 'count', 'avg_monthly_searches', 'avg_cpc', 'avg_competition']
+    return '{{"version":"{}","intents":{}}}'.format(dataset.version, summary.to_json(orient='records'))
+
+
+def create_app(get_dataset, cache_size=1024):
+    # get_dataset returns the current ka.KeywordDataset, so a reloader can swap it underneath
+    cache = LRUCache(cache_size)
+
+    async def cached_json(request, endpoint, extra, compute):
+        dataset = get_dataset()
+        query = normalize_query(request.query)
+        key = cache_key(endpoint, query, extra)
+        etag = make_etag(dataset.version, key)
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+
+        # The version is part of the cache key, so entries from an older dataset are never served
+        versioned_key = dataset.version + key
+        body = cache.get(versioned_key)
+        if body is None:
+            # Filtering runs in a worker thread so a cache miss doesn't stall other requests
+            body = await asyncio.to_thread(lambda: compute(dataset, query_filters(query)).encode('utf-8'))
+            cache.put(versioned_key, body)
+        return web.Response(body=body, content_type='application/json', headers={'ETag': etag})
+
+    async def version(request):
+        dataset = get_dataset()
+        return web.json_response({'version': dataset.version, 'rows': len(dataset.df)})
+
+    async def keywords(request):
+        if request.query.get('format') == 'ndjson':
+            return await stream_keywords(request)
+        limit = _int_param(request.query, 'limit', DEFAULT_LIMIT, 1, MAX_LIMIT)
+        offset = _int_param(request.query, 'offset', 0)
+        return await cached_json(request, 'keywords', (limit, offset),
+                                 lambda dataset, filters: keywords_body(dataset, filters, limit, offset))
+
+    async def stream_keywords(request):
+        # Large result sets are streamed in chunks instead of being cached
+        dataset = get_dataset()
+        query = normalize_query(request.query)
+        etag = make_etag(dataset.version, cache_key('keywords.ndjson', query))
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+
+        filtered_df = await asyncio.to_thread(response_frame, dataset, query_filters(query))
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson', 'ETag': etag})
+        await response.prepare(request)
+        for start in range(0, len(filtered_df), NDJSON_CHUNK_ROWS):
+            chunk = await asyncio.to_thread(filtered_df.iloc[start:start + NDJSON_CHUNK_ROWS].to_json,
+                                            orient='records', lines=True)
+            await response.write(chunk.rstrip('\n').encode('utf-8') + b'\n')
+        await response.write_eof()
+        return response
+
+    async def top(request):
+        k = _int_param(request.query, 'k', 20, 1, MAX_LIMIT)
+        return await cached_json(request, 'top', (k,), lambda dataset, filters: top_body(dataset, filters, k))
+
+    async def intents(request):
+        return await cached_json(request, 'intents', (), intents_body)
+
+    app = web.Application()
+    app.router.add_get('/version', version)
+    app.router.add_get('/keywords', keywords)
+    app.router.add_get('/top', top)
+    app.router.add_get('/intents', intents)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the keyword dataset as a local read-only JSON API.")
+    parser.add_argument('--data', default=ka.DATA_FILE, help="Keyword CSV with search intent (default: %(default)s)")
+    parser.add_argument('--host', default='127.0.0.1', help="Bind address (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8502, help="Port (default: %(default)s)")
+    parser.add_argument('--cache-size', type=int, default=1024, help="Cached responses kept (default: %(default)s)")
+    args = parser.parse_args()
+
+    watcher = DatasetWatcher(args.data).start()
+    dataset = watcher.current()
+    print(f"Serving {len(dataset.df)} keywords (version {dataset.version}) on http://{args.host}:{args.port}")
+    web.run_app(create_app(watcher.current, args.cache_size), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import math
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+import keyword_analytics as ka
+
+# Offline semantic clustering stage, run after classify_intent.py / pipeline.py.
+# Keywords are embedded as word (1-2 gram) + character (3-5 gram) TF-IDF in one sparse
+# float32 matrix, clustered with MiniBatchKMeans, and the cluster name (top centroid terms)
+# is stored in a categorical 'semantic_cluster' column. The fitted vectorizers and centroids
+# are saved so new keywords can be assigned to their nearest cluster without reclustering.
+
+MODEL_FILE = "keyword_clusters.joblib"
+CLUSTER_COLUMN = 'semantic_cluster'
+
+# Vocabulary caps keep the sparse matrix and centroids bounded on ~10^6 keywords
+MAX_WORD_FEATURES = 50000
+MAX_CHAR_FEATURES = 50000
+NAME_TERMS = 3
+
+
+def default_cluster_count(n_keywords):
+    return int(min(max(2, math.sqrt(n_keywords / 2)), 200))
+
+
+def build_vectorizers(n_keywords):
+    min_df = 2 if n_keywords >= 1000 else 1
+    word = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), min_df=min_df, max_features=MAX_WORD_FEATURES,
+                           sublinear_tf=True, dtype=np.float32)
+    char = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5), min_df=min_df, max_features=MAX_CHAR_FEATURES,
+                           sublinear_tf=True, dtype=np.float32)
+    return word, char
+
+
+def vectorize(model, keywords):
+    keywords = keywords.astype(str).str.lower()
+    matrix = sparse.hstack([model['word'].transform(keywords), model['char'].transform(keywords)], format='csr')
+    return normalize(matrix)
+
+
+def cluster_names(kmeans, word_vectorizer):
+    # Name each cluster after its highest-weighted word n-grams (the word block comes first)
+    terms = word_vectorizer.get_feature_names_out()
+    centroids = kmeans.cluster_centers_[:, :len(terms)]
+    names, seen = [], set()
+    for cluster, weights in enumerate(centroids):
+        top = [terms[i] for i in np.argsort(weights)[::-1][:NAME_TERMS] if weights[i] > 0]
+        name = ' / '.join(top) or f'cluster {cluster}'
+        if name in seen:
+            name = f'{name} ({cluster})'
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def fit_clusters(keywords, n_clusters=None, random_state=0):
+    n_clusters = min(n_clusters or default_cluster_count(len(keywords)), len(keywords))
+    word, char = build_vectorizers(len(keywords))
+    normalized = keywords.astype(str).str.lower()
+    word.fit(normalized)
+    char.fit(normalized)
+
+    model = {'word': word, 'char': char}
+    matrix = vectorize(model, keywords)
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=3, random_state=random_state)
+    labels = kmeans.fit_predict(matrix)
+
+    model['kmeans'] = kmeans
+    model['names'] = cluster_names(kmeans, word)
+    return model, labels
+
+
+def cluster_labels(model, labels):
+    return pd.Categorical.from_codes(labels, categories=model['names'])
+
+
+def assign_clusters(model, keywords):
+    # Incremental assignment: nearest existing centroid, no refit
+    return cluster_labels(model, model['kmeans'].predict(vectorize(model, keywords)))
+
+
+def read_keyword_files(path):
+    # The same files the dashboard would load (merged CSV or the newer shard set), read one by one
+    # so labelled rows can be written back to the file they came from
+    files = ka.dataset_files(path)
+    if not files:
+        raise FileNotFoundError(f"No keyword data file or shards found for {path}")
+    return files, [pd.read_csv(file) for file in files]
+
+
+def write_keyword_files(df, files, frames):
+    # Clustering leaves the numeric columns alone, so each file's sketch sidecar stays valid
+    start = 0
+    for file, frame in zip(files, frames):
+        df.iloc[start:start + len(frame)].to_csv(file, index=False)
+        start += len(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic keyword clustering (TF-IDF + MiniBatch k-means).")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fit = subparsers.add_parser('fit', help="Cluster all keywords and save the model")
+    fit.add_argument('--input', default=ka.DATA_FILE, help="Keyword CSV with search intent (default: %(default)s)")
+    fit.add_argument('--output', help="Output CSV with the semantic_cluster column (default: update the input file or shards)")
+    fit.add_argument('--model', default=MODEL_FILE, help="Where to save the fitted model (default: %(default)s)")
+    fit.add_argument('--clusters', type=int, help="Number of clusters (default: sqrt(n/2), at most 200)")
+
+    assign = subparsers.add_parser('assign', help="Assign keywords to the nearest existing cluster")
+    assign.add_argument('--input', default=ka.DATA_FILE, help="Keyword CSV to label (default: %(default)s)")
+    assign.add_argument('--output', help="Output CSV (default: update the input file or shards)")
+    assign.add_argument('--model', default=MODEL_FILE, help="Fitted model to use (default: %(default)s)")
+
+    args = parser.parse_args()
+
+    files, frames = read_keyword_files(args.input)
+    print(f"Loading keywords from {', '.join(files) if len(files) <= 3 else f'{len(files)} shard files'}")
+    df = pd.concat(frames, ignore_index=True)
+
+    if args.command == 'fit':
+        model, labels = fit_clusters(df['keyword'], args.clusters)
+        df[CLUSTER_COLUMN] = cluster_labels(model, labels)
+        joblib.dump(model, args.model)
+        print(f"Fitted {len(model['names'])} clusters, model saved to {args.model}")
+    else:
+        model = joblib.load(args.model)
+        df[CLUSTER_COLUMN] = assign_clusters(model, df['keyword'])
+        print(f"Assigned {len(df)} keywords to {len(model['names'])} existing clusters")
+
+    print("Largest clusters by total monthly searches:")
+    print(ka.semantic_cluster_summary(df).head(15).to_string(index=False))
+
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"Data with semantic clusters saved to {args.output}")
+    else:
+        write_keyword_files(df, files, frames)
+        print(f"Semantic clusters written back to {len(files)} file(s)")
+
+
+if __name__ == "__main__":
+    main()
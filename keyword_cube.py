@@ -0,0 +1,294 @@
+import numpy as np
+import pandas as pd
+
+# Precomputed data cube over the dimensions the dashboard breaks keywords down by.
+# Each cell holds the row count plus, per measure, the non-null count, sum and sum of squares,
+# so counts/means/std of any slice or roll-up come from adding cells instead of rescanning rows.
+
+CATEGORY_DIMENSIONS = ['search_intent', 'competition_text', 'currency']
+
+# Bucketed dimension -> source column; buckets are cut at fixed quantiles of the column
+BUCKET_DIMENSIONS = {
+    'volume_bucket': 'avg_monthly_searches',
+    'cpc_bucket': 'cpc',
+    'competition_bucket': 'competition_score',
+}
+
+MEASURES = ['avg_monthly_searches', 'cpc', 'competition_score']
+
+BUCKET_QUANTILES = np.linspace(0, 1, 11)
+
+# Layout of the leading "stat" axis of the cube array
+STATS = ['count'] + [f'{stat}_{measure}' for measure in MEASURES for stat in ('n', 'sum', 'sumsq')]
+
+
+def bucket_edges(values, quantiles=BUCKET_QUANTILES):
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.array([0.0, 0.0])
+    edges = np.unique(np.quantile(values, quantiles))
+    if len(edges) == 1:
+        # Constant column (or a single row): one degenerate bucket [v, v]
+        edges = np.repeat(edges, 2)
+    return edges
+
+
+def bucket_codes(values, edges):
+    # Bucket i covers [edges[i], edges[i + 1]), the last one also includes the max.
+    # Missing values go to an extra trailing bucket that no range ever selects.
+    n_buckets = max(len(edges) - 1, 1)
+    codes = np.searchsorted(edges[1:-1], values, side='right')
+    codes[np.isnan(values)] = n_buckets
+    return codes, n_buckets
+
+
+def prefix_table(cells, axes):
+    # Summed-area table over the given axes with a leading zero plane, so the sum over
+    # buckets [start, stop) on each axis is an inclusion-exclusion of 2 ** len(axes) corners
+    pad = [(0, 0)] * cells.ndim
+    for axis in axes:
+        pad[axis] = (1, 0)
+    prefix = np.pad(cells, pad)
+    for axis in axes:
+        np.cumsum(prefix, axis=axis, out=prefix)
+    return prefix
+
+
+def _contiguous_bounds(indices, size):
+    if indices is None:
+        return 0, size
+    if len(indices) == 0:
+        return 0, 0
+    if indices[-1] - indices[0] + 1 != len(indices) or np.any(np.diff(indices) != 1):
+        return None
+    return int(indices[0]), int(indices[-1]) + 1
+
+
+class KeywordCube:
+    def __init__(self, dimensions, labels, cells, bucket_bounds, prefix=None, selection=None, keep=None):
+        self.dimensions = dimensions
+        self.labels = labels
+        self.cells = cells
+        self.bucket_bounds = bucket_bounds
+        self.prefix = prefix
+        self.selection = selection or {}
+        self.keep = tuple(dimensions) if keep is None else tuple(keep)
+
+    @classmethod
+    def from_frame(cls, df, quantiles=BUCKET_QUANTILES):
+        dimensions = CATEGORY_DIMENSIONS + list(BUCKET_DIMENSIONS)
+        codes, labels, bucket_bounds = [], {}, {}
+
+        for dim in CATEGORY_DIMENSIONS:
+            dim_codes, uniques = pd.factorize(df[dim], sort=True, use_na_sentinel=False)
+            codes.append(dim_codes)
+            labels[dim] = list(uniques)
+
+        for dim, column in BUCKET_DIMENSIONS.items():
+            values = df[column].to_numpy(dtype=float)
+            edges = bucket_edges(values, quantiles)
+            dim_codes, n_buckets = bucket_codes(values, edges)
+            codes.append(dim_codes)
+            labels[dim] = [(edges[i], edges[i + 1]) for i in range(n_buckets)] + [None]
+
+            # Actual min/max inside each bucket decide whether a slider range splits it
+            present = dim_codes < n_buckets
+            lows = np.full(n_buckets, np.inf)
+            highs = np.full(n_buckets, -np.inf)
+            np.minimum.at(lows, dim_codes[present], values[present])
+            np.maximum.at(highs, dim_codes[present], values[present])
+            bucket_bounds[dim] = (lows, highs)
+
+        shape = tuple(len(labels[dim]) for dim in dimensions)
+        size = int(np.prod(shape))
+        flat = np.ravel_multi_index(codes, shape) if len(df) else np.zeros(0, dtype=np.intp)
+
+        cells = np.empty((len(STATS), size))
+        cells[0] = np.bincount(flat, minlength=size)
+        for i, measure in enumerate(MEASURES):
+            values = df[measure].to_numpy(dtype=float)
+            present = ~np.isnan(values)
+            values = np.where(present, values, 0.0)
+            cells[1 + 3 * i] = np.bincount(flat, weights=present.astype(float), minlength=size)
+            cells[2 + 3 * i] = np.bincount(flat, weights=values, minlength=size)
+            cells[3 + 3 * i] = np.bincount(flat, weights=values * values, minlength=size)
+
+        cells = cells.reshape((len(STATS),) + shape)
+        bucket_axes = [1 + dimensions.index(dim) for dim in BUCKET_DIMENSIONS]
+        return cls(dimensions, labels, cells, bucket_bounds, prefix=prefix_table(cells, bucket_axes))
+
+    def _view(self, selection=None, keep=None):
+        return KeywordCube(self.dimensions, self.labels, self.cells, self.bucket_bounds, self.prefix,
+                           self.selection if selection is None else selection,
+                           self.keep if keep is None else keep)
+
+    def slice(self, **criteria):
+        # criteria: dim -> label or list of labels; bucket dims take bucket indices instead
+        selection = dict(self.selection)
+        for dim, values in criteria.items():
+            if dim not in self.dimensions:
+                raise KeyError(f"Unknown cube dimension: {dim}")
+            if not isinstance(values, (list, tuple, np.ndarray)):
+                values = [values]
+            if dim in BUCKET_DIMENSIONS:
+                indices = np.asarray(values, dtype=np.intp)
+            else:
+                lookup = {label: i for i, label in enumerate(self.labels[dim])}
+                indices = np.array([lookup[v] for v in values if v in lookup], dtype=np.intp)
+            if dim in selection:
+                indices = np.intersect1d(selection[dim], indices)
+            selection[dim] = indices
+        return self._view(selection=selection)
+
+    def rollup(self, *dims):
+        return self._view(keep=[dim for dim in self.keep if dim not in dims])
+
+    def drilldown(self, *dims):
+        return self._view(keep=[dim for dim in self.dimensions if dim in self.keep or dim in dims])
+
+    def range_buckets(self, dim, value_range):
+        # Buckets fully inside value_range, or None when a boundary lands inside a bucket
+        lows, highs = self.bucket_bounds[dim]
+        empty = lows > highs
+        inside = (lows >= value_range[0]) & (highs <= value_range[1])
+        outside = (highs < value_range[0]) | (lows > value_range[1]) | empty
+        if not np.all(inside | outside):
+            return None
+        return np.flatnonzero(inside & ~empty)
+
+    def query(self, intent='All', volume_range=None, cpc_range=None, competition_range=None,
+              keyword_contains=''):
+        # Same arguments as keyword_analytics.filter_keywords; None means the rows must be scanned
+        if keyword_contains:
+            return None
+        criteria = {}
+        if intent and intent != 'All':
+            criteria['search_intent'] = intent
+        ranges = {'volume_bucket': volume_range, 'cpc_bucket': cpc_range, 'competition_bucket': competition_range}
+        for dim, value_range in ranges.items():
+            if value_range is None:
+                # Full span: every non-missing bucket
+                criteria[dim] = np.arange(len(self.labels[dim]) - 1)
+                continue
+            buckets = self.range_buckets(dim, value_range)
+            if buckets is None:
+                return None
+            criteria[dim] = buckets
+        return self.slice(**criteria)
+
+    def _bucket_range_cells(self):
+        # Cells with every bucket dimension summed out via the prefix table, or None when a
+        # bucket dimension is kept or its selection is not one contiguous run of buckets
+        if self.prefix is None or any(dim in self.keep for dim in BUCKET_DIMENSIONS):
+            return None
+        bounds = []
+        for dim in BUCKET_DIMENSIONS:
+            dim_bounds = _contiguous_bounds(self.selection.get(dim), len(self.labels[dim]))
+            if dim_bounds is None:
+                return None
+            bounds.append(dim_bounds)
+
+        n_category = len(CATEGORY_DIMENSIONS)
+        cells = 0
+        for corner in range(2 ** len(bounds)):
+            index = [slice(None)] * (1 + n_category)
+            sign = 1
+            for i, (start, stop) in enumerate(bounds):
+                if corner >> i & 1:
+                    index.append(start)
+                    sign = -sign
+                else:
+                    index.append(stop)
+            cells = cells + sign * self.prefix[tuple(index)]
+        return cells
+
+    def aggregate(self):
+        # Stat array over the kept dimensions: shape (len(STATS), *kept dimension sizes)
+        cells = self._bucket_range_cells()
+        if cells is None:
+            dimensions, cells = self.dimensions, self.cells
+        else:
+            dimensions = CATEGORY_DIMENSIONS
+        for dim, indices in self.selection.items():
+            if dim in dimensions:
+                cells = np.take(cells, indices, axis=1 + dimensions.index(dim))
+        rolled = tuple(1 + i for i, dim in enumerate(dimensions) if dim not in self.keep)
+        return cells.sum(axis=rolled) if rolled else cells
+
+    def totals(self):
+        stats = self.rollup(*self.dimensions).aggregate()
+        return _stat_summary(dict(zip(STATS, stats)))
+
+    def to_frame(self):
+        stats = self.aggregate()
+        kept_labels = [self._kept_labels(dim) for dim in self.keep]
+        index = pd.MultiIndex.from_product(kept_labels, names=list(self.keep)) if self.keep else None
+        frame = pd.DataFrame(_stat_summary({stat: stats[i].ravel() for i, stat in enumerate(STATS)}), index=index)
+        frame = frame[frame['count'] > 0]
+        return frame.reset_index() if self.keep else frame
+
+    def _kept_labels(self, dim):
+        labels = self.labels[dim]
+        if dim in self.selection:
+            return [labels[i] for i in self.selection[dim]]
+        return labels
+
+
+def _stat_summary(stats):
+    summary = {'count': stats['count']}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for measure in MEASURES:
+            n = stats[f'n_{measure}']
+            total = stats[f'sum_{measure}']
+            mean = total / n
+            # Sample variance (ddof=1) to match pandas .std()
+            var = (stats[f'sumsq_{measure}'] - n * mean * mean) / (n - 1)
+            summary[f'sum_{measure}'] = total
+            summary[f'mean_{measure}'] = mean
+            summary[f'std_{measure}'] = np.sqrt(np.maximum(var, 0))
+    return summary
+
+
+def build_cube(df):
+    return KeywordCube.from_frame(df)
+
+
+# Dashboard views answered from a cube slice, shaped like their keyword_analytics counterparts
+
+def summary_metrics(view):
+    totals = view.totals()
+    return {
+        'total_keywords': int(totals['count']),
+        'avg_volume': totals['mean_avg_monthly_searches'],
+        'avg_cpc': totals['mean_cpc'],
+        'avg_competition': totals['mean_competition_score'],
+    }
+
+
+def _by_intent(view):
+    # Per-intent stats straight from the cube arrays, skipping intents with no rows
+    by_intent = view.rollup(*view.dimensions).drilldown('search_intent')
+    stats = _stat_summary(dict(zip(STATS, by_intent.aggregate())))
+    intents = np.array(by_intent._kept_labels('search_intent'), dtype=object)
+    present = stats['count'] > 0
+    return intents[present], {key: values[present] for key, values in stats.items()}
+
+
+def intent_summary(view):
+    intents, stats = _by_intent(view)
+    order = np.argsort(-stats['count'], kind='stable')
+    return pd.DataFrame({
+        'Intent': intents[order],
+        'Count': stats['count'][order].astype(int),
+        'Avg. Monthly Searches': stats['mean_avg_monthly_searches'][order],
+        'Avg. CPC': stats['mean_cpc'][order],
+        'Avg. Competition': stats['mean_competition_score'][order],
+    })
+
+
+def intent_volume(view):
+    intents, stats = _by_intent(view)
+    return pd.DataFrame({
+        'search_intent': intents,
+        'avg_monthly_searches': stats['sum_avg_monthly_searches'],
+    })
@@ -0,0 +1,139 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import currency_normalization as cn
+import keyword_analytics as ka
+import quantile_sketch as qs
+import snapshot_store as ss
+from clean_deduplicate_data import clean_keywords, normalize_keywords
+from classify_intent import add_search_intent
+
+# Sharded clean + classify pipeline. Rows are hash-partitioned by normalized keyword, so every
+# copy of a keyword lands in the same shard and deduplication stays shard-local. Each shard is
+# cleaned, coerced, given its cpc and classified in a worker process; the shards are then
+# merged back in the original row order (same output as running the two scripts in sequence)
+# and/or written as per-shard files that keyword_analytics.load_keywords can read in parallel.
+# Each shard also builds quantile sketches of its numeric columns; they are merged for the
+# merged output and saved per shard alongside the shard files.
+
+COMBINED_FILE = "combined_keywords.csv"
+
+
+def shard_ids(keywords, n_shards):
+    hashes = pd.util.hash_array(normalize_keywords(keywords).to_numpy(dtype=object))
+    return hashes % n_shards
+
+
+def process_shard(shard, shard_df, n_shards, shard_output=None, unit_options=None):
+    # clean_keywords keeps the original row index, which the merge step sorts on
+    df = add_search_intent(clean_keywords(shard_df, verbose=False, **(unit_options or {})), verbose=False)
+    sketches = qs.build_sketches(df)
+    if shard_output:
+        path = ka.shard_path(shard_output, shard, n_shards)
+        qs.save_sketches(path, sketches)
+        df.to_csv(path, index=False)
+    return shard, df, sketches
+
+
+def run_pipeline(df, n_shards, workers=None, shard_output=None, unit_options=None):
+    # unit_options: fx_table / reporting_currency / as_of, passed on to clean_keywords
+    if "Keyword" not in df.columns:
+        raise KeyError("'Keyword' column not found.")
+    df = df.reset_index(drop=True)
+    groups = df.groupby(shard_ids(df["Keyword"], n_shards), sort=True)
+    if shard_output:
+        remove_shard_files(shard_output)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_shard, shard, shard_df, n_shards, shard_output, unit_options)
+                   for shard, shard_df in groups]
+        results = [future.result() for future in futures]
+
+    results.sort(key=lambda result: result[0])
+    return [df for _, df, _ in results], qs.merge_sketches([sketches for _, _, sketches in results])
+
+
+def remove_shard_files(output):
+    # Shards that come out empty are not written, so clear the previous run's files (and their
+    # sketch sidecars) first; otherwise a leftover shard of the same count would be read back
+    for path in ka.shard_files(output):
+        for file in (path, qs.sketch_path(path)):
+            if os.path.exists(file):
+                os.remove(file)
+
+
+def merge_shards(shards):
+    return pd.concat(shards).sort_index().reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean, deduplicate and classify keywords in parallel hash shards.")
+    parser.add_argument('--input', default=COMBINED_FILE, help="Combined raw keyword CSV (default: %(default)s)")
+    parser.add_argument('--output', default=ka.DATA_FILE, help="Merged output CSV (default: %(default)s)")
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1, help="Number of hash shards (default: CPU count)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--shard-files', action='store_true',
+                        help="Also write <output>.shard-NNN-of-NNN.csv files next to the output")
+    parser.add_argument('--no-merge', action='store_true', help="Only write the per-shard files")
+    parser.add_argument('--fx-table', default=cn.FX_FILE,
+                        help="Dated FX rates CSV used to convert CPCs; skipped if missing (default: %(default)s)")
+    parser.add_argument('--reporting-currency', default=cn.REPORTING_CURRENCY,
+                        help="Currency CPC columns are converted into (default: %(default)s)")
+    parser.add_argument('--as-of', help="Use the FX rates in effect on this date (default: latest)")
+    parser.add_argument('--snapshot-source', action='append', default=[],
+                        help="Raw export(s) whose 'Keyword Stats' date the run is stored under in the snapshot "
+                             "history; the latest date wins (repeatable, default: no snapshot)")
+    parser.add_argument('--snapshot-date', help="Store the run in the snapshot history under this date (YYYY-MM-DD)")
+    parser.add_argument('--history-dir', default=ss.HISTORY_DIR, help="Snapshot history root (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.no_merge and not args.shard_files:
+        parser.error("--no-merge needs --shard-files")
+
+    start = time.time()
+    print(f"Loading combined keywords from {args.input}")
+    df = pd.read_csv(args.input)
+    print(f"Shape of dataframe before cleaning and deduplication: {df.shape}")
+
+    unit_options = {'reporting_currency': args.reporting_currency, 'as_of': args.as_of}
+    if os.path.exists(args.fx_table):
+        unit_options['fx_table'] = cn.load_fx_table(args.fx_table)
+        print(f"Converting CPC columns to {args.reporting_currency} with rates from {args.fx_table}")
+    else:
+        print(f"No {args.fx_table} found; CPC columns are kept in their original currency.")
+
+    shards, sketches = run_pipeline(df, args.shards, args.workers, args.output if args.shard_files else None,
+                                    unit_options)
+    print(f"Processed {len(shards)} shards: {sum(len(shard) for shard in shards)} keywords after deduplication")
+    if args.shard_files:
+        print(f"Shard files written as {ka.shard_path(args.output, 0, args.shards)} ...")
+
+    snapshot_date = args.snapshot_date
+    if snapshot_date is None and args.snapshot_source:
+        snapshot_date = max(ss.read_export_date(path) for path in args.snapshot_source)
+
+    merged = merge_shards(shards) if not args.no_merge or snapshot_date else None
+    if snapshot_date:
+        try:
+            path = ss.append_snapshot(merged, snapshot_date, args.history_dir)
+            print(f"Stored snapshot {snapshot_date} ({path})")
+        except FileExistsError as e:
+            # History is append-only; rerunning the same export leaves the stored snapshot alone
+            print(f"Warning: {e}; not overwriting it.")
+
+    if not args.no_merge:
+        qs.save_sketches(args.output, sketches)
+        merged.to_csv(args.output, index=False)
+        print("Value counts for search_intent:")
+        print(merged["search_intent"].value_counts(dropna=False))
+        print(f"Data with search intent saved to {args.output}")
+
+    print(f"Done in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
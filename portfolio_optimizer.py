@@ -0,0 +1,184 @@
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+import keyword_analytics as ka
+
+# Budget-constrained keyword portfolio: choose the keywords that maximize expected clicks (or
+# click value) for a monthly spend cap, optionally with per-intent spend caps and a competition
+# limit. Expected monthly clicks are avg_monthly_searches * ctr; a keyword's monthly cost is its
+# clicks at the chosen CPC bound (cpc_low / cpc / cpc_high). competition_score (0-100) scales
+# the value down by `penalty` at full competition.
+#
+# Greedy mode sorts by value/cost once; every budget change is then a prefix search over the
+# cached cumulative cost, plus a few vectorized fill passes for keywords that still fit.
+# Exact mode solves the 0/1 knapsack as a MILP (HiGHS) and is used automatically for small pools.
+
+COST_BASIS_COLUMNS = {'low': 'cpc_low', 'mid': 'cpc', 'high': 'cpc_high'}
+OBJECTIVES = ['clicks', 'value']
+
+DEFAULT_CTR = 0.03
+EXACT_MAX_CANDIDATES = 5000
+FILL_PASSES = 3
+
+PORTFOLIO_COLUMNS = ['keyword', 'search_intent', 'avg_monthly_searches', 'cpc', 'competition_score',
+                     'expected_clicks', 'monthly_cost', 'expected_value']
+
+Portfolio = namedtuple('Portfolio', ['selected', 'spend', 'clicks', 'value', 'method'])
+
+
+def candidate_frame(df, objective='clicks', cost_basis='high', ctr=DEFAULT_CTR, penalty=0.5, max_competition=None):
+    # Per-keyword clicks, cost and penalized value; missing competition counts as 0
+    cost_column = COST_BASIS_COLUMNS[cost_basis]
+    competition = df['competition_score'].fillna(0)
+
+    candidates = df.assign(
+        expected_clicks=df['avg_monthly_searches'] * ctr,
+    )
+    candidates['monthly_cost'] = candidates['expected_clicks'] * df[cost_column]
+    gross_value = candidates['expected_clicks'] if objective == 'clicks' else candidates['expected_clicks'] * df['cpc']
+    candidates['expected_value'] = gross_value * (1 - penalty * competition / 100).clip(lower=0)
+
+    keep = candidates['monthly_cost'].notna() & (candidates['expected_value'] > 0)
+    if max_competition is not None:
+        keep &= competition <= max_competition
+    return candidates[keep]
+
+
+class GreedySolver:
+    def __init__(self, candidates):
+        self.candidates = candidates
+        cost = candidates['monthly_cost'].to_numpy(dtype=float)
+        value = candidates['expected_value'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore'):
+            ratio = np.where(cost > 0, value / cost, np.inf)
+
+        # Everything below only depends on the candidate pool, not on the budget
+        self.order = np.argsort(-ratio, kind='stable')
+        self.cost = cost[self.order]
+        self.value = value[self.order]
+        self.cum_cost = np.cumsum(self.cost)
+        self.intent_codes, intents = pd.factorize(candidates['search_intent'].to_numpy()[self.order])
+        self.intents = pd.Index(intents)
+        self.intent_cum_cost = pd.Series(self.cost).groupby(self.intent_codes).cumsum().to_numpy()
+
+    def _intent_caps(self, budget, intent_caps):
+        # intent -> max share of the budget; intents without a cap may use all of it
+        caps = np.full(len(self.intents), np.inf)
+        for intent, share in (intent_caps or {}).items():
+            if intent in self.intents:
+                caps[self.intents.get_loc(intent)] = share * budget
+        return caps
+
+    def solve(self, budget, intent_caps=None):
+        caps = self._intent_caps(budget, intent_caps)
+        if intent_caps:
+            # Per-intent prefix first, then the global prefix over what survived
+            eligible = self.intent_cum_cost <= caps[self.intent_codes]
+            cum_cost = np.cumsum(np.where(eligible, self.cost, 0))
+            selected = eligible & (cum_cost <= budget)
+        else:
+            selected = np.zeros(len(self.cost), dtype=bool)
+            selected[:np.searchsorted(self.cum_cost, budget, side='right')] = True
+
+        # Fill passes: cheaper keywords further down the ratio order that still fit
+        for _ in range(FILL_PASSES):
+            left = budget - self.cost[selected].sum()
+            intent_left = caps - np.bincount(self.intent_codes[selected], weights=self.cost[selected],
+                                             minlength=len(self.intents))
+            fits = ~selected & (self.cost <= left) & (self.cost <= intent_left[self.intent_codes])
+            if not fits.any():
+                break
+            fit_cost = np.where(fits, self.cost, 0)
+            intent_cum = pd.Series(fit_cost).groupby(self.intent_codes).cumsum().to_numpy()
+            fits &= (np.cumsum(fit_cost) <= left) & (intent_cum <= intent_left[self.intent_codes])
+            selected |= fits
+
+        return self._portfolio(self.order[selected], 'greedy')
+
+    def _portfolio(self, rows, method):
+        chosen = self.candidates.iloc[np.sort(rows)]
+        chosen = chosen.sort_values('expected_value', ascending=False)
+        return Portfolio(chosen[[col for col in PORTFOLIO_COLUMNS if col in chosen.columns]],
+                         chosen['monthly_cost'].sum(), chosen['expected_clicks'].sum(),
+                         chosen['expected_value'].sum(), method)
+
+
+def solve_exact(solver, budget, intent_caps=None, time_limit=10.0):
+    # 0/1 knapsack with per-intent spend rows, solved by HiGHS through scipy's milp
+    n = len(solver.cost)
+    rows = [solver.cost]
+    upper = [budget]
+    caps = solver._intent_caps(budget, intent_caps)
+    for code, cap in enumerate(caps):
+        if np.isfinite(cap):
+            rows.append(np.where(solver.intent_codes == code, solver.cost, 0))
+            upper.append(cap)
+
+    result = milp(
+        c=-solver.value,
+        constraints=LinearConstraint(np.vstack(rows), -np.inf, np.array(upper)),
+        integrality=np.ones(n),
+        bounds=Bounds(0, 1),
+        options={'time_limit': time_limit, 'mip_rel_gap': 1e-6}
+    )
+    # On a time limit the MILP incumbent can trail the greedy answer; keep the better one
+    greedy = solver.solve(budget, intent_caps)
+    if result.x is None:
+        return greedy
+    exact = solver._portfolio(solver.order[result.x > 0.5], 'exact')
+    return exact if exact.value >= greedy.value else greedy
+
+
+def optimize_portfolio(df, budget, mode='auto', intent_caps=None, **candidate_options):
+    solver = GreedySolver(candidate_frame(df, **candidate_options))
+    if mode == 'exact' or (mode == 'auto' and len(solver.cost) <= EXACT_MAX_CANDIDATES):
+        return solve_exact(solver, budget, intent_caps)
+    return solver.solve(budget, intent_caps)
+
+
+def parse_intent_caps(values):
+    caps = {}
+    for value in values:
+        intent, _, share = value.partition('=')
+        caps[intent.strip()] = float(share)
+    return caps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the keyword portfolio that maximizes clicks or value under a monthly budget.")
+    parser.add_argument('--data', default=ka.DATA_FILE, help="Keyword CSV with search intent (default: %(default)s)")
+    parser.add_argument('--budget', type=float, required=True, help="Monthly spend cap")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='clicks', help="Maximize clicks or clicks * CPC (default: %(default)s)")
+    parser.add_argument('--cost-basis', choices=list(COST_BASIS_COLUMNS), default='high', help="CPC bound used for cost (default: %(default)s)")
+    parser.add_argument('--ctr', type=float, default=DEFAULT_CTR, help="Expected click-through rate (default: %(default)s)")
+    parser.add_argument('--penalty', type=float, default=0.5, help="Value penalty at competition score 100 (default: %(default)s)")
+    parser.add_argument('--max-competition', type=float, help="Exclude keywords above this competition score")
+    parser.add_argument('--intent-cap', action='append', default=[], metavar='INTENT=SHARE',
+                        help="Max share of the budget for an intent, e.g. informational=0.2 (repeatable)")
+    parser.add_argument('--mode', choices=['auto', 'greedy', 'exact'], default='auto',
+                        help=f"Solver; auto uses exact up to {EXACT_MAX_CANDIDATES} candidates (default: %(default)s)")
+    parser.add_argument('--output', help="Write the selected keywords to this CSV")
+    args = parser.parse_args()
+
+    df = ka.load_keywords(args.data)
+    portfolio = optimize_portfolio(
+        df, args.budget, mode=args.mode, intent_caps=parse_intent_caps(args.intent_cap),
+        objective=args.objective, cost_basis=args.cost_basis, ctr=args.ctr,
+        penalty=args.penalty, max_competition=args.max_competition
+    )
+
+    print(f"{portfolio.method} portfolio: {len(portfolio.selected)} keywords, spend {portfolio.spend:,.2f} "
+          f"of {args.budget:,.2f}, {portfolio.clicks:,.1f} clicks, value {portfolio.value:,.1f}")
+    print(portfolio.selected.groupby('search_intent')['monthly_cost'].sum().to_string())
+    print(portfolio.selected.head(20).to_string(index=False))
+    if args.output:
+        portfolio.selected.to_csv(args.output, index=False)
+        print(f"Portfolio saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import json
+import math
+import os
+
+import numpy as np
+
+# Mergeable KLL quantile sketches for the numeric keyword columns. They are built while the
+# clean step runs (per shard in pipeline.py), merged without rereading rows, and stored next to
+# the dataset as <data file stem>.sketches.json so the dashboard can scale its sliders and draw
+# histograms without scanning the frame. min/max are tracked exactly, so the 0th/100th
+# percentiles are the true column bounds.
+
+SKETCH_COLUMNS = ['avg_monthly_searches', 'cpc', 'competition_score']
+DEFAULT_K = 200
+
+
+class KLLSketch:
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        # Compact any level over capacity: sort it, pair up its lowest items (an even number,
+        # leaving half the capacity in place), keep every other one of them (random offset) and
+        # promote those to the next level with double weight. Repeat until every level fits.
+        compacted = True
+        while compacted:
+            compacted = False
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                capacity = self._capacity(level)
+                if len(items) <= capacity:
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                n_paired = max(2, (len(items) - capacity // 2) // 2 * 2)
+                promoted = items[:n_paired][self._rng.integers(2)::2]
+                self.levels[level] = items[n_paired:]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                compacted = True
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        # q in [0, 1]; scalar or array
+        q = np.asarray(q, dtype=float)
+        if self.n == 0:
+            return np.full(q.shape, np.nan) if q.ndim else math.nan
+        items, cum_weights = self._weighted_items()
+        ranks = q * cum_weights[-1]
+        values = items[np.minimum(np.searchsorted(cum_weights, ranks, side='left'), len(items) - 1)]
+        values = np.where(q <= 0, self.min, np.where(q >= 1, self.max, values))
+        return values if q.ndim else float(values)
+
+    def cdf(self, values):
+        # Estimated fraction of items <= each value
+        values = np.asarray(values, dtype=float)
+        if self.n == 0:
+            return np.zeros(values.shape)
+        items, cum_weights = self._weighted_items()
+        index = np.searchsorted(items, values, side='right')
+        below = np.where(index > 0, cum_weights[np.maximum(index - 1, 0)], 0.0)
+        return below / cum_weights[-1]
+
+    def histogram(self, bins=20, lower_quantile=0.0, upper_quantile=0.99):
+        # Estimated counts over equal-width bins between two quantiles (heavy tails are cut off)
+        low, high = self.quantile(lower_quantile), self.quantile(upper_quantile)
+        if not high > low:
+            high = low + 1
+        edges = np.linspace(low, high, bins + 1)
+        fractions = self.cdf(edges)
+        fractions[0] = self.cdf(np.nextafter(low, -np.inf))
+        return edges, np.diff(fractions) * self.n
+
+    def to_dict(self):
+        return {
+            'k': self.k,
+            'n': self.n,
+            'min': self.min if self.n else None,
+            'max': self.max if self.n else None,
+            'levels': [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.n = data['n']
+        if sketch.n:
+            sketch.min, sketch.max = data['min'], data['max']
+        sketch.levels = [np.asarray(items, dtype=float) for items in data['levels']] or [np.empty(0)]
+        return sketch
+
+
+def build_sketches(df, columns=SKETCH_COLUMNS, k=DEFAULT_K):
+    return {column: KLLSketch(k).update(df[column].to_numpy(dtype=float)) for column in columns if column in df.columns}
+
+
+def merge_sketches(sketch_sets):
+    merged = {}
+    for sketches in sketch_sets:
+        for column, sketch in sketches.items():
+            if column in merged:
+                merged[column].merge(sketch)
+            else:
+                merged[column] = KLLSketch.from_dict(sketch.to_dict())
+    return merged
+
+
+def sketch_path(data_path):
+    root, _ = os.path.splitext(data_path)
+    return root + '.sketches.json'
+
+
+def save_sketches(data_path, sketches):
+    path = sketch_path(data_path)
+    with open(path, 'w') as f:
+        json.dump({column: sketch.to_dict() for column, sketch in sketches.items()}, f)
+    return path
+
+
+def load_sketches(data_path):
+    # None when no sidecar exists for this data file
+    path = sketch_path(data_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return {column: KLLSketch.from_dict(data) for column, data in json.load(f).items()}
+
+
+def remove_sketches(data_path):
+    # Drop a sidecar that no longer describes data_path
+    path = sketch_path(data_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def sketches_match(sketches, df, columns=SKETCH_COLUMNS):
+    # Sidecars are written separately from the data file, so only trust one that covers the
+    # same number of non-null values and the same min/max as the frame it is loaded with
+    for column in columns:
+        if column not in df.columns:
+            continue
+        if column not in sketches:
+            return False
+        sketch, values = sketches[column], df[column]
+        if sketch.n != int(values.notna().sum()):
+            return False
+        # Tolerance only for the last-digit drift of a CSV round trip
+        if sketch.n and not (math.isclose(sketch.min, values.min(), rel_tol=1e-9, abs_tol=1e-12) and
+                             math.isclose(sketch.max, values.max(), rel_tol=1e-9, abs_tol=1e-12)):
+            return False
+    return True
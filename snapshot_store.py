@@ -0,0 +1,169 @@
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import keyword_analytics as ka
+
+# Append-only history of keyword exports. Each pipeline run is stored as one Parquet partition
+#   keyword_history/export_date=YYYY-MM-DD/keywords.parquet
+# sorted by a 64-bit hash of the keyword. The sorted hash column is the keyword index: two
+# snapshots are diffed by intersecting their hash arrays instead of joining the full frames.
+
+HISTORY_DIR = "keyword_history"
+PARTITION_FILE = "keywords.parquet"
+
+SNAPSHOT_COLUMNS = ['keyword', 'avg_monthly_searches', 'cpc_low', 'cpc_high', 'cpc',
+                    'competition_score', 'competition_text', 'currency', 'source_currency', 'search_intent']
+
+# Columns compared between snapshots when deciding whether a keyword changed
+DIFF_MEASURES = ['avg_monthly_searches', 'cpc']
+
+EXPORT_DATE_PATTERN = re.compile(r'Keyword Stats (\d{4}-\d{2}-\d{2})')
+
+
+def read_export_date(path):
+    # Raw Keyword Planner exports start with a "Keyword Stats YYYY-MM-DD at HH_MM_SS" line
+    for encoding in ('utf-16', 'utf-8', 'latin1'):
+        try:
+            with open(path, encoding=encoding) as f:
+                first_line = f.readline()
+        except (UnicodeError, UnicodeDecodeError):
+            continue
+        match = EXPORT_DATE_PATTERN.search(first_line)
+        if match:
+            return match.group(1)
+    raise ValueError(f"No 'Keyword Stats YYYY-MM-DD' preamble found in {path}")
+
+
+def keyword_hashes(keywords):
+    normalized = keywords.astype(str).str.lower().str.strip()
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy(dtype=np.uint64)
+
+
+def partition_path(export_date, history_dir=HISTORY_DIR):
+    return os.path.join(history_dir, f"export_date={export_date}", PARTITION_FILE)
+
+
+def list_snapshots(history_dir=HISTORY_DIR):
+    if not os.path.isdir(history_dir):
+        return []
+    dates = []
+    for name in os.listdir(history_dir):
+        if name.startswith('export_date=') and os.path.exists(os.path.join(history_dir, name, PARTITION_FILE)):
+            dates.append(name.split('=', 1)[1])
+    return sorted(dates)
+
+
+def append_snapshot(df, export_date, history_dir=HISTORY_DIR):
+    path = partition_path(export_date, history_dir)
+    if os.path.exists(path):
+        raise FileExistsError(f"Snapshot for {export_date} already exists at {path}")
+
+    snapshot = df[[col for col in SNAPSHOT_COLUMNS if col in df.columns]].copy()
+    snapshot.insert(0, 'keyword_hash', keyword_hashes(snapshot['keyword']))
+    snapshot = (snapshot.drop_duplicates(subset=['keyword_hash'], keep='first')
+                .sort_values('keyword_hash', kind='stable')
+                .reset_index(drop=True))
+
+    # Write next to the final path and rename so readers never see a half-written partition
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    snapshot.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_snapshot(export_date, columns=None, history_dir=HISTORY_DIR):
+    path = partition_path(export_date, history_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No snapshot for {export_date} in {history_dir}")
+    if columns is not None:
+        columns = ['keyword_hash'] + [col for col in columns if col != 'keyword_hash']
+    return pd.read_parquet(path, columns=columns)
+
+
+def diff_snapshots(old_date, new_date, history_dir=HISTORY_DIR):
+    columns = ['keyword', 'search_intent'] + DIFF_MEASURES
+    old = read_snapshot(old_date, columns, history_dir)
+    new = read_snapshot(new_date, columns, history_dir)
+
+    # Both partitions are stored sorted by unique keyword hash
+    old_hash = old['keyword_hash'].to_numpy()
+    new_hash = new['keyword_hash'].to_numpy()
+    _, old_idx, new_idx = np.intersect1d(old_hash, new_hash, assume_unique=True, return_indices=True)
+
+    added = np.ones(len(new), dtype=bool)
+    added[new_idx] = False
+    dropped = np.ones(len(old), dtype=bool)
+    dropped[old_idx] = False
+
+    changed = pd.DataFrame({
+        'keyword': new['keyword'].to_numpy()[new_idx],
+        'search_intent': new['search_intent'].to_numpy()[new_idx],
+    })
+    any_change = np.zeros(len(new_idx), dtype=bool)
+    for measure in DIFF_MEASURES:
+        before = old[measure].to_numpy(dtype=float)[old_idx]
+        after = new[measure].to_numpy(dtype=float)[new_idx]
+        changed[f'{measure}_old'] = before
+        changed[f'{measure}_new'] = after
+        changed[f'{measure}_delta'] = after - before
+        # NaN on both sides is not a change; NaN on one side is
+        any_change |= ~((before == after) | (np.isnan(before) & np.isnan(after)))
+
+    return {
+        'new': new.loc[added, ['keyword', 'search_intent'] + DIFF_MEASURES].reset_index(drop=True),
+        'dropped': old.loc[dropped, ['keyword', 'search_intent'] + DIFF_MEASURES].reset_index(drop=True),
+        'changed': changed[any_change].reset_index(drop=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append-only keyword snapshot history.")
+    parser.add_argument('--history-dir', default=HISTORY_DIR, help="History root directory (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest = subparsers.add_parser('ingest', help="Store the current keyword file as a new snapshot")
+    ingest.add_argument('--data', default=ka.DATA_FILE, help="Keyword CSV with search intent (default: %(default)s)")
+    ingest.add_argument('--source', action='append', default=[],
+                        help="Raw export(s) to read the 'Keyword Stats' date from; the latest date wins")
+    ingest.add_argument('--export-date', help="Export date (YYYY-MM-DD) when no raw export is given")
+
+    subparsers.add_parser('list', help="List stored snapshots")
+
+    diff = subparsers.add_parser('diff', help="Compare two snapshots")
+    diff.add_argument('old_date')
+    diff.add_argument('new_date')
+    diff.add_argument('--output-prefix', help="Write <prefix>_new.csv, _dropped.csv and _changed.csv")
+
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        if args.export_date:
+            export_date = args.export_date
+        elif args.source:
+            export_date = max(read_export_date(path) for path in args.source)
+        else:
+            parser.error("ingest needs --source or --export-date")
+        df = pd.read_csv(args.data)
+        path = append_snapshot(df, export_date, args.history_dir)
+        print(f"Stored {len(df)} keywords from {args.data} as snapshot {export_date} ({path})")
+
+    elif args.command == 'list':
+        for export_date in list_snapshots(args.history_dir):
+            print(export_date)
+
+    elif args.command == 'diff':
+        changes = diff_snapshots(args.old_date, args.new_date, args.history_dir)
+        print(f"Changes from {args.old_date} to {args.new_date}:")
+        for name, frame in changes.items():
+            print(f"  {name}: {len(frame)} keywords")
+            if args.output_prefix:
+                frame.to_csv(f"{args.output_prefix}_{name}.csv", index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keyword_analytics as ka  # noqa: E402
+import keyword_cube as kc  # noqa: E402
+import quantile_sketch as qs  # noqa: E402
+
+INTENTS = ['commercial', 'informational', 'navigational', 'transactional']
+
+
+def make_keywords(n=600, seed=0):
+    # Synthetic cleaned + classified keywords with heavy-tailed volume/CPC and some gaps
+    rng = np.random.default_rng(seed)
+    volume = np.round(rng.lognormal(5, 1.5, n)).astype(float)
+    cpc_low = np.round(rng.lognormal(0.5, 0.8, n), 2)
+    cpc_high = np.round(cpc_low * rng.uniform(1, 4, n), 2)
+    competition = rng.integers(0, 101, n).astype(float)
+    cpc_low[rng.random(n) < 0.05] = np.nan
+    competition[rng.random(n) < 0.05] = np.nan
+    df = pd.DataFrame({
+        'keyword': [f'vfx keyword {i} studio' if i % 3 else f'animation service {i}' for i in range(n)],
+        'avg_monthly_searches': volume,
+        'cpc_low': cpc_low,
+        'cpc_high': cpc_high,
+        'competition_score': competition,
+        'competition_text': pd.cut(competition, [-1, 33, 66, 100], labels=['Low', 'Medium', 'High']).astype(object),
+        'currency': 'CAD',
+        'search_intent': rng.choice(INTENTS, n),
+    })
+    df['cpc'] = (df['cpc_low'] + df['cpc_high']) / 2
+    return df
+
+
+@pytest.fixture
+def keywords():
+    return ka.prepare_keywords(make_keywords())
+
+
+def make_dataset(df, version='v1'):
+    # In-memory KeywordDataset, as ka.load_dataset would build it from a file
+    df = ka.prepare_keywords(df)
+    return ka.KeywordDataset(df, kc.build_cube(df), qs.build_sketches(df), version, None)
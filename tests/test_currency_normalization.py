@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import currency_normalization as cn
+
+
+@pytest.fixture
+def fx_table():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2025-01-01'] * 3 + ['2025-05-01'] * 3),
+        'currency': ['USD', 'CAD', 'GBP'] * 2,
+        'units_per_usd': [1.0, 1.40, 0.80, 1.0, 1.38, 0.75],
+    })
+
+
+def cpc_frame(currencies):
+    n = len(currencies)
+    return pd.DataFrame({'keyword': [f'k{i}' for i in range(n)], 'currency': currencies,
+                         'cpc_low': [1.0] * n, 'cpc_high': [3.0] * n, 'cpc': [2.0] * n,
+                         'yoy_change': ['26%'] * n})
+
+
+def test_parse_percent():
+    parsed = cn.parse_percent(pd.Series(['26%', '-50%', '∞', ' --', '1,200%', None]))
+    np.testing.assert_array_equal(parsed.to_numpy(), [0.26, -0.5, np.inf, np.nan, 12.0, np.nan])
+
+
+def test_fx_rates_as_of(fx_table):
+    assert cn.fx_rates(fx_table)['CAD'] == 1.38
+    assert cn.fx_rates(fx_table, '2025-02-01')['CAD'] == 1.40
+    # Before the first row every currency falls back to its earliest rate
+    assert cn.fx_rates(fx_table, '2024-01-01')['GBP'] == 0.80
+
+
+def test_normalize_units_converts_and_relabels(fx_table):
+    out = cn.normalize_units(cpc_frame(['CAD', 'usd', 'GBP']), fx_table, 'CAD')
+    np.testing.assert_allclose(out['cpc'], [2.0, 2.0 * 1.38, 2.0 * 1.38 / 0.75])
+    np.testing.assert_allclose(out['cpc_high'] / out['cpc_low'], 3.0)
+    assert out['currency'].tolist() == ['CAD'] * 3
+    assert out['source_currency'].tolist() == ['CAD', 'usd', 'GBP']
+    assert out['yoy_change'].tolist() == [0.26] * 3
+
+
+def test_unknown_currency_raises(fx_table):
+    with pytest.raises(ValueError, match='JPY'):
+        cn.normalize_units(cpc_frame(['CAD', 'JPY']), fx_table, 'CAD')
+    with pytest.raises(ValueError, match='EUR'):
+        cn.normalize_units(cpc_frame(['CAD']), fx_table, 'EUR')
+
+
+def test_scaler_rescales_from_cached_arrays(fx_table):
+    df = cn.normalize_units(cpc_frame(['CAD', 'USD']), fx_table, 'CAD')
+    scaler = cn.CurrencyScaler(df, cn.fx_rates(fx_table))
+    assert scaler.native_currency() == 'CAD'
+    usd = scaler.rescale(df, 'USD')
+    np.testing.assert_allclose(usd['cpc'], [2.0 / 1.38, 2.0])
+    assert usd['currency'].tolist() == ['USD', 'USD']
+    back = scaler.rescale(usd, 'CAD')
+    np.testing.assert_allclose(back['cpc'], df['cpc'])
@@ -0,0 +1,29 @@
+import os
+
+import keyword_analytics as ka
+
+
+def touch(path, mtime):
+    with open(path, 'w') as f:
+        f.write('keyword\n')
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_newest_of_merged_file_and_shard_sets_wins(tmp_path):
+    merged = str(tmp_path / 'keywords.csv')
+    old_set = [touch(ka.shard_path(merged, shard, 3), 1000 + shard) for shard in range(3)]
+    touch(merged, 2000)
+    assert ka.dataset_files(merged) == [merged]
+
+    # A later --no-merge run takes over from the merged file; the 3-shard leftovers are ignored
+    new_set = [touch(ka.shard_path(merged, shard, 2), 3000) for shard in range(2)]
+    assert ka.dataset_files(merged) == new_set
+    assert set(ka.shard_files(merged)) == set(old_set + new_set)
+
+    touch(merged, 4000)
+    assert ka.dataset_files(merged) == [merged]
+
+
+def test_no_files(tmp_path):
+    assert ka.dataset_files(str(tmp_path / 'keywords.csv')) == []
@@ -0,0 +1,80 @@
+import os
+
+import keyword_analytics as ka
+from dataset_watcher import DatasetWatcher
+
+from conftest import make_keywords
+
+
+class Clock:
+    # Explicit, strictly increasing mtimes so stat changes never depend on filesystem resolution
+    def __init__(self):
+        self.now = 1_700_000_000
+
+    def touch(self, path):
+        self.now += 10
+        os.utime(path, (self.now, self.now))
+
+
+def write(path, clock, df=None, text=None):
+    if text is not None:
+        with open(path, 'w') as f:
+            f.write(text)
+    else:
+        df.to_csv(path, index=False)
+    clock.touch(path)
+
+
+def test_reload_waits_for_one_stable_poll_and_swaps(tmp_path):
+    path, clock = str(tmp_path / 'keywords.csv'), Clock()
+    write(path, clock, make_keywords(n=200, seed=0))
+    watcher = DatasetWatcher(path)
+    old = watcher.current()
+    assert watcher.check() is False
+
+    write(path, clock, make_keywords(n=300, seed=1))
+    assert watcher.check() is False        # changed: wait one poll
+    write(path, clock, make_keywords(n=400, seed=2))
+    assert watcher.check() is False        # still being written
+    assert watcher.current() is old
+
+    assert watcher.check() is True         # stable for one poll: swapped in
+    new = watcher.current()
+    assert len(new.df) == 400 and new.version != old.version
+    # Readers holding the old version keep a complete dataset
+    assert len(old.df) == 200 and old.cube is not new.cube
+    assert watcher.check() is False
+
+
+def test_identical_rewrite_does_not_swap(tmp_path):
+    path, clock = str(tmp_path / 'keywords.csv'), Clock()
+    df = make_keywords(n=200)
+    write(path, clock, df)
+    watcher = DatasetWatcher(path)
+    old = watcher.current()
+
+    write(path, clock, df)
+    assert watcher.check() is False
+    assert watcher.check() is False
+    assert watcher.current() is old
+
+
+def test_failed_reload_keeps_old_version_until_next_change(tmp_path):
+    path, clock = str(tmp_path / 'keywords.csv'), Clock()
+    write(path, clock, make_keywords(n=200))
+    loads = []
+    watcher = DatasetWatcher(path, loader=lambda p: loads.append(p) or ka.load_dataset(p))
+    old = watcher.current()
+
+    write(path, clock, text='not,a,keyword,file\n1,2,3,4\n')
+    assert watcher.check() is False
+    assert watcher.check() is False        # load fails
+    assert watcher.current() is old
+    attempts = len(loads)
+    assert watcher.check() is False        # no retry until the file changes again
+    assert len(loads) == attempts
+
+    write(path, clock, make_keywords(n=250, seed=3))
+    assert watcher.check() is False
+    assert watcher.check() is True
+    assert len(watcher.current().df) == 250
@@ -0,0 +1,61 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import generate_reports as gr
+import keyword_analytics as ka
+
+
+@pytest.fixture
+def no_chrome(monkeypatch):
+    # Chart images need Chrome through kaleido; the tests only check the report plumbing
+    monkeypatch.setattr(gr, 'figure_to_img_tag', lambda fig: '<img src="chart">')
+    monkeypatch.setattr(gr, 'check_chrome', lambda: None)
+    monkeypatch.setattr(gr.kaleido, 'start_sync_server', lambda **kwargs: None)
+    monkeypatch.setattr(gr.kaleido, 'stop_sync_server', lambda **kwargs: None)
+
+
+def test_render_report_writes_filtered_csv_and_html(keywords, tmp_path, no_chrome):
+    preset = {'name': 'Commercial, CPC 1-10', 'intent': 'commercial', 'cpc_range': [1, 10]}
+    [(name, count, written)] = gr.generate_reports(keywords, [preset], str(tmp_path), ('html', 'csv'), workers=1)
+
+    expected = ka.filter_keywords(keywords, intent='commercial', cpc_range=(1, 10))
+    assert (name, count) == (preset['name'], len(expected))
+    assert sorted(os.path.basename(path) for path in written) == ['commercial-cpc-1-10.csv',
+                                                                  'commercial-cpc-1-10.html']
+
+    csv = pd.read_csv(tmp_path / 'commercial-cpc-1-10.csv')
+    assert csv['keyword'].tolist() == expected['keyword'].tolist()
+
+    report = (tmp_path / 'commercial-cpc-1-10.html').read_text(encoding='utf-8')
+    assert 'VFX Keyword Report: Commercial, CPC 1-10' in report
+    assert f'Showing {len(expected):,} of {len(keywords):,} keywords' in report
+    assert report.count('<img src="chart">') == 3
+
+
+def test_failed_render_leaves_no_html(keywords, tmp_path, no_chrome, monkeypatch):
+    def broken(fig):
+        raise RuntimeError('no browser')
+    monkeypatch.setattr(gr, 'figure_to_img_tag', broken)
+    with pytest.raises(RuntimeError):
+        gr.render_report({'name': 'all'}, str(tmp_path), ('html',), df=keywords)
+    assert not os.path.exists(tmp_path / 'all.html')
+
+
+def test_colliding_preset_names_get_distinct_files(keywords, tmp_path, no_chrome):
+    presets_path = tmp_path / 'presets.json'
+    presets_path.write_text(json.dumps([
+        {'name': 'CPC < 10', 'cpc_range': [0, 10]},
+        {'name': 'CPC > 10', 'cpc_range': [10, 1000]},
+        {'name': 'cpc-10'},
+    ]))
+    presets = gr.load_presets(str(presets_path))
+    assert [preset['slug'] for preset in presets] == ['cpc-10', 'cpc-10-2', 'cpc-10-3']
+
+    output_dir = tmp_path / 'reports'
+    results = gr.generate_reports(keywords, presets, str(output_dir), ('csv',), workers=1)
+    assert sorted(os.listdir(output_dir)) == ['cpc-10-2.csv', 'cpc-10-3.csv', 'cpc-10.csv']
+    counts = {name: count for name, count, _ in results}
+    assert len(pd.read_csv(output_dir / 'cpc-10-2.csv')) == counts['CPC > 10']
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+from aiohttp.test_utils import TestClient, TestServer
+
+import keyword_analytics as ka
+import keyword_api
+
+from conftest import make_dataset, make_keywords
+
+
+def run_client(get_dataset, scenario):
+    # Runs scenario(client) against an in-process server for the app
+    async def main():
+        async with TestClient(TestServer(keyword_api.create_app(get_dataset))) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+
+def test_keywords_filters_and_pagination():
+    dataset = make_dataset(make_keywords())
+    expected = ka.filter_keywords(dataset.df, intent='commercial', cpc_range=(1.0, 10.0))
+
+    async def scenario(client):
+        pages = []
+        for offset in (0, 50):
+            response = await client.get('/keywords', params={'intent': 'Commercial', 'min_cpc': '1',
+                                                             'max_cpc': '10', 'limit': '50', 'offset': offset})
+            assert response.status == 200
+            pages.append(await response.json())
+        return pages
+
+    first, second = run_client(lambda: dataset, scenario)
+    assert first['total'] == second['total'] == len(expected)
+    assert (first['offset'], first['limit'], second['offset']) == (0, 50, 50)
+    keywords = [item['keyword'] for item in first['items'] + second['items']]
+    assert keywords == expected['keyword'].head(100).tolist()
+    assert all(item['search_intent'] == 'commercial' and 1 <= item['cpc'] <= 10
+               for item in first['items'] + second['items'])
+
+
+def test_top_and_intents():
+    dataset = make_dataset(make_keywords())
+
+    async def scenario(client):
+        top = await (await client.get('/top', params={'k': '5'})).json()
+        intents = await (await client.get('/intents')).json()
+        return top, intents
+
+    top, intents = run_client(lambda: dataset, scenario)
+    assert [item['keyword'] for item in top['items']] == dataset.df.nlargest(5, 'value_score')['keyword'].tolist()
+    counts = {row['intent']: row['count'] for row in intents['intents']}
+    assert counts == ka.filter_keywords(dataset.df)['search_intent'].value_counts().to_dict()
+
+
+def test_matching_etag_returns_304():
+    dataset = make_dataset(make_keywords())
+
+    async def scenario(client):
+        first = await client.get('/top', params={'k': '10', 'intent': 'informational'})
+        etag = first.headers['ETag']
+        # Equivalent query spelled differently maps to the same ETag
+        again = await client.get('/top', params={'intent': 'Informational ', 'k': '10'},
+                                 headers={'If-None-Match': etag})
+        other = await client.get('/top', params={'k': '11', 'intent': 'informational'},
+                                 headers={'If-None-Match': etag})
+        return first.status, again.status, other.status
+
+    assert run_client(lambda: dataset, scenario) == (200, 304, 200)
+
+
+def test_cache_invalidated_when_dataset_version_changes():
+    datasets = {'current': make_dataset(make_keywords(seed=0), version='v1')}
+
+    async def scenario(client):
+        before = await client.get('/keywords', params={'limit': '5'})
+        before_body, before_etag = await before.json(), before.headers['ETag']
+        datasets['current'] = make_dataset(make_keywords(n=300, seed=1), version='v2')
+        after = await client.get('/keywords', params={'limit': '5'}, headers={'If-None-Match': before_etag})
+        return before_body, after.status, await after.json(), after.headers['ETag'], before_etag
+
+    before, status, after, after_etag, before_etag = run_client(lambda: datasets['current'], scenario)
+    assert status == 200
+    assert after_etag != before_etag
+    assert (before['version'], after['version']) == ('v1', 'v2')
+    assert after['total'] == len(ka.filter_keywords(datasets['current'].df))
+    assert after['items'] != before['items']
+
+
+def test_ndjson_streams_one_line_per_keyword(monkeypatch):
+    # Small chunks so the stream spans several writes
+    monkeypatch.setattr(keyword_api, 'NDJSON_CHUNK_ROWS', 64)
+    dataset = make_dataset(make_keywords())
+    expected = ka.filter_keywords(dataset.df, volume_range=(100, np.inf))
+
+    async def scenario(client):
+        response = await client.get('/keywords', params={'format': 'ndjson', 'min_volume': '100'})
+        return response.status, response.headers['Content-Type'], await response.text()
+
+    status, content_type, text = run_client(lambda: dataset, scenario)
+    lines = text.splitlines()
+    assert status == 200 and content_type.startswith('application/x-ndjson')
+    assert text.endswith('\n')
+    assert len(lines) == len(expected)
+    assert [json.loads(line)['keyword'] for line in lines] == expected['keyword'].tolist()
+
+
+def test_non_finite_integer_params_are_rejected():
+    dataset = make_dataset(make_keywords())
+
+    async def scenario(client):
+        results = []
+        for path, params in [('/keywords', {'limit': 'nan'}), ('/keywords', {'limit': '1e999'}),
+                             ('/top', {'k': 'inf'}), ('/keywords', {'offset': 'abc'})]:
+            response = await client.get(path, params=params)
+            results.append((response.status, await response.json()))
+        return results
+
+    for status, body in run_client(lambda: dataset, scenario):
+        assert status == 400
+        assert 'error' in body
+
+
+def test_cache_miss_does_not_block_other_requests(monkeypatch):
+    dataset = make_dataset(make_keywords())
+    slow_body = keyword_api.keywords_body
+
+    def keywords_body(*args):
+        time.sleep(0.5)
+        return slow_body(*args)
+    monkeypatch.setattr(keyword_api, 'keywords_body', keywords_body)
+
+    async def scenario(client):
+        slow = asyncio.ensure_future(client.get('/keywords', params={'limit': '5'}))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        version = await client.get('/version')
+        elapsed = time.perf_counter() - start
+        version_first = not slow.done()
+        return version.status, elapsed, version_first, (await slow).status
+
+    status, elapsed, version_first, slow_status = run_client(lambda: dataset, scenario)
+    assert (status, slow_status) == (200, 200)
+    assert version_first and elapsed < 0.3
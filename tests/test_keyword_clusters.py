@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import keyword_analytics as ka
+import keyword_clusters as kcl
+
+from conftest import make_keywords
+
+KEYWORDS = pd.Series(
+    [f'vfx studio {city}' for city in ['toronto', 'vancouver', 'montreal', 'london', 'los angeles']] +
+    [f'3d animation {thing}' for thing in ['software', 'course', 'company', 'services', 'studio']] +
+    [f'color grading {thing}' for thing in ['suite', 'software', 'course', 'services', 'tutorial']]
+)
+
+
+def test_fit_assign_round_trip():
+    model, labels = kcl.fit_clusters(KEYWORDS, n_clusters=3)
+    clusters = kcl.cluster_labels(model, labels)
+    assert isinstance(clusters, pd.Categorical)
+    assert len(set(model['names'])) == len(model['names']) == 3
+    assert list(clusters.categories) == model['names']
+    # The three families separate cleanly
+    assert all(len(set(labels[i:i + 5])) == 1 for i in range(0, 15, 5))
+    assert len(set(labels)) == 3
+
+    # Refitting is not needed for new keywords: nearest existing centroid, centroids untouched
+    centers = model['kmeans'].cluster_centers_.copy()
+    new = pd.Series(['vfx studio calgary', 'color grading presets'])
+    assigned = kcl.assign_clusters(model, new)
+    distances = ((kcl.vectorize(model, new).toarray()[:, None, :] - centers[None]) ** 2).sum(axis=2)
+    assert list(assigned.codes) == list(distances.argmin(axis=1))
+    assert list(assigned) == [clusters[0], clusters[10]]
+    np.testing.assert_array_equal(model['kmeans'].cluster_centers_, centers)
+
+
+def test_reads_and_writes_back_newest_shard_set(tmp_path):
+    merged = str(tmp_path / 'keywords.csv')
+    pd.DataFrame({'keyword': ['stale merged keyword']}).to_csv(merged, index=False)
+    shards = [ka.shard_path(merged, shard, 2) for shard in range(2)]
+    rows = make_keywords(n=len(KEYWORDS)).assign(keyword=KEYWORDS)
+    for shard, part in zip(shards, [rows[:8], rows[8:]]):
+        part.to_csv(shard, index=False)
+    stamp = 1_700_000_000
+    os.utime(merged, (stamp, stamp))
+
+    files, frames = kcl.read_keyword_files(merged)
+    assert files == shards
+    df = pd.concat(frames, ignore_index=True)
+    model, labels = kcl.fit_clusters(df['keyword'], n_clusters=3)
+    df[kcl.CLUSTER_COLUMN] = kcl.cluster_labels(model, labels)
+    kcl.write_keyword_files(df, files, frames)
+
+    assert ka.dataset_files(merged) == shards
+    loaded = ka.load_keywords(merged)
+    assert loaded['keyword'].tolist() == KEYWORDS.tolist()
+    assert loaded[kcl.CLUSTER_COLUMN].dtype == 'category'
+    assert pd.read_csv(merged)['keyword'].tolist() == ['stale merged keyword']
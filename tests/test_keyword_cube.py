@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import keyword_analytics as ka
+import keyword_cube as kc
+
+
+def bucket_aligned_range(cube, dim, first, last):
+    # Value range covering exactly buckets first..last, so the cube can answer it
+    lows, highs = cube.bucket_bounds[dim]
+    return (float(lows[first]), float(highs[last]))
+
+
+def assert_matches_scan(cube, df, **filters):
+    view = cube.query(**filters)
+    assert view is not None
+    filtered = ka.filter_keywords(df, **filters)
+
+    expected = ka.summary_metrics(filtered)
+    actual = kc.summary_metrics(view)
+    assert actual['total_keywords'] == expected['total_keywords']
+    for key in ('avg_volume', 'avg_cpc', 'avg_competition'):
+        np.testing.assert_allclose(actual[key], expected[key], rtol=1e-9)
+
+    expected_intents = ka.intent_summary(filtered).sort_values('Intent').reset_index(drop=True)
+    actual_intents = kc.intent_summary(view).sort_values('Intent').reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual_intents, expected_intents, check_dtype=False)
+
+    expected_volume = ka.intent_volume(filtered).sort_values('search_intent').reset_index(drop=True)
+    actual_volume = kc.intent_volume(view).sort_values('search_intent').reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual_volume, expected_volume, check_dtype=False)
+
+
+def test_unfiltered_query_matches_row_scan(keywords):
+    assert_matches_scan(kc.build_cube(keywords), keywords)
+
+
+def test_intent_query_matches_row_scan(keywords):
+    cube = kc.build_cube(keywords)
+    for intent in ka.filter_options(keywords)['intents']:
+        assert_matches_scan(cube, keywords, intent=intent)
+
+
+def test_bucket_aligned_ranges_match_row_scan(keywords):
+    cube = kc.build_cube(keywords)
+    filters = dict(
+        intent='commercial',
+        volume_range=bucket_aligned_range(cube, 'volume_bucket', 2, 7),
+        cpc_range=bucket_aligned_range(cube, 'cpc_bucket', 0, 4),
+        competition_range=bucket_aligned_range(cube, 'competition_bucket', 3, 9),
+    )
+    assert_matches_scan(cube, keywords, **filters)
+
+
+def test_range_splitting_a_bucket_falls_back_to_scan(keywords):
+    cube = kc.build_cube(keywords)
+    lows, highs = cube.bucket_bounds['cpc_bucket']
+    midpoint = float((lows[3] + highs[3]) / 2)
+    assert cube.query(cpc_range=(midpoint, float(highs[-1]))) is None
+    assert cube.query(keyword_contains='studio') is None
+
+
+def test_drilldown_counts_match_groupby(keywords):
+    cube = kc.build_cube(keywords)
+    frame = cube.rollup(*cube.dimensions).drilldown('search_intent', 'competition_text').to_frame()
+    expected = keywords.groupby(['search_intent', 'competition_text'], dropna=False).size()
+    actual = frame.set_index(['search_intent', 'competition_text'])['count']
+    assert actual.sum() == len(keywords)
+    for key, count in expected.items():
+        assert actual.loc[key] == count
+
+
+def test_std_matches_pandas(keywords):
+    totals = kc.build_cube(keywords).totals()
+    for measure in kc.MEASURES:
+        np.testing.assert_allclose(totals[f'std_{measure}'], keywords[measure].std(), rtol=1e-6)
+
+
+def test_constant_column_gets_one_bucket(keywords):
+    keywords = keywords.assign(competition_score=50.0)
+    cube = kc.build_cube(keywords)
+    assert cube.labels['competition_bucket'] == [(50.0, 50.0), None]
+    assert_matches_scan(cube, keywords, competition_range=(50.0, 50.0))
+    assert_matches_scan(cube, keywords, competition_range=(0.0, 100.0))
+
+
+def test_single_row_dataset(keywords):
+    one_row = keywords.dropna(subset=kc.MEASURES).head(1)
+    cube = kc.build_cube(one_row)
+    assert kc.summary_metrics(cube.query())['total_keywords'] == 1
+    assert_matches_scan(cube, one_row)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import portfolio_optimizer as po
+
+from conftest import make_keywords
+
+BUDGETS = [0.0, 50.0, 500.0, 5000.0]
+INTENT_CAPS = {'informational': 0.1, 'commercial': 0.3}
+
+
+@pytest.fixture
+def solver():
+    return po.GreedySolver(po.candidate_frame(make_keywords(n=300), objective='value', cost_basis='high'))
+
+
+def spend_by_intent(portfolio):
+    return portfolio.selected.groupby('search_intent')['monthly_cost'].sum()
+
+
+def assert_feasible(portfolio, budget, intent_caps=None):
+    assert portfolio.spend <= budget + 1e-9
+    assert portfolio.selected['keyword'].is_unique
+    for intent, share in (intent_caps or {}).items():
+        assert spend_by_intent(portfolio).get(intent, 0.0) <= share * budget + 1e-9
+
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_greedy_stays_within_budget(solver, budget):
+    assert_feasible(solver.solve(budget), budget)
+
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_greedy_respects_intent_caps(solver, budget):
+    assert_feasible(solver.solve(budget, INTENT_CAPS), budget, INTENT_CAPS)
+
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_exact_is_feasible_and_no_worse_than_greedy(solver, budget):
+    exact = po.solve_exact(solver, budget, INTENT_CAPS)
+    assert_feasible(exact, budget, INTENT_CAPS)
+    assert exact.value >= solver.solve(budget, INTENT_CAPS).value - 1e-9
+
+
+def test_budget_covering_everything_selects_all(solver):
+    portfolio = solver.solve(float(solver.cum_cost[-1]) + 1)
+    assert len(portfolio.selected) == len(solver.candidates)
+    np.testing.assert_allclose(portfolio.spend, solver.cost.sum())
+
+
+def test_competition_filter_and_missing_costs():
+    candidates = po.candidate_frame(make_keywords(n=300), max_competition=50)
+    assert (candidates['competition_score'].fillna(0) <= 50).all()
+    assert candidates['monthly_cost'].notna().all()
+    assert (candidates['expected_value'] > 0).all()
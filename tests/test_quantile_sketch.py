@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import keyword_analytics as ka
+import quantile_sketch as qs
+
+from conftest import make_keywords
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def max_rank_error(sketch, values):
+    # Largest gap between the true rank of each sketch quantile and the requested quantile
+    values = np.sort(values)
+    estimates = sketch.quantile(QUANTILES)
+    ranks = np.searchsorted(values, estimates, side='right') / len(values)
+    return np.max(np.abs(ranks - QUANTILES))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_rank_error_under_one_percent(seed):
+    values = np.random.default_rng(seed).lognormal(3, 2, 200_000)
+    sketch = qs.KLLSketch(seed=seed).update(values)
+    assert sketch.n == len(values)
+    assert max_rank_error(sketch, values) < 0.01
+    assert (sketch.quantile(0), sketch.quantile(1)) == (values.min(), values.max())
+
+
+def test_merged_sketches_stay_accurate():
+    rng = np.random.default_rng(3)
+    parts = [rng.lognormal(3, 2, 40_000), rng.normal(500, 50, 25_000), rng.uniform(0, 10, 60_000)]
+    merged = qs.KLLSketch(seed=0)
+    for i, part in enumerate(parts):
+        merged.merge(qs.KLLSketch(seed=i).update(part))
+    values = np.concatenate(parts)
+    assert merged.n == len(values)
+    assert max_rank_error(merged, values) < 0.01
+    assert sum(len(level) for level in merged.levels) < 2000
+
+
+def test_cdf_and_missing_values():
+    values = np.arange(1000, dtype=float)
+    sketch = qs.KLLSketch().update(np.concatenate([values, [np.nan] * 10]))
+    assert sketch.n == 1000
+    np.testing.assert_allclose(sketch.cdf([99.0, 499.0, 999.0]), [0.1, 0.5, 1.0], atol=0.01)
+    edges, counts = sketch.histogram(10, upper_quantile=1.0)
+    assert len(edges) == 11
+    np.testing.assert_allclose(counts.sum(), 1000, atol=10)
+
+
+def test_round_trip_through_sidecar(tmp_path):
+    df = make_keywords()
+    data_path = str(tmp_path / 'keywords.csv')
+    sketches = qs.build_sketches(df)
+    qs.save_sketches(data_path, sketches)
+    loaded = qs.load_sketches(data_path)
+    for column, sketch in sketches.items():
+        np.testing.assert_array_equal(loaded[column].quantile(QUANTILES), sketch.quantile(QUANTILES))
+
+
+def test_stale_sidecar_is_rebuilt(tmp_path):
+    data_path = str(tmp_path / 'keywords.csv')
+    old = make_keywords(n=300, seed=0)
+    qs.save_sketches(data_path, qs.build_sketches(old))
+    # The CSV is replaced without refreshing its sidecar
+    new = make_keywords(n=500, seed=1)
+    new.to_csv(data_path, index=False)
+
+    assert not qs.sketches_match(qs.load_sketches(data_path), new)
+    dataset = ka.load_dataset(data_path)
+    assert dataset.sketches['cpc'].n == new['cpc'].notna().sum()
+    assert dataset.sketches['avg_monthly_searches'].quantile(1) == new['avg_monthly_searches'].max()
+
+    # Same rows rewritten with scaled CPCs: counts still match, the bounds don't
+    qs.save_sketches(data_path, qs.build_sketches(new))
+    scaled = new.assign(cpc=new['cpc'] * 3)
+    scaled.to_csv(data_path, index=False)
+    assert not qs.sketches_match(qs.load_sketches(data_path), scaled)
+    dataset = ka.load_dataset(data_path)
+    assert dataset.sketches['cpc'].quantile(1) == pytest.approx(scaled['cpc'].max())
+
+    # An untouched sidecar is still used as is
+    qs.save_sketches(data_path, qs.build_sketches(scaled))
+    assert qs.sketches_match(qs.load_sketches(data_path), ka.load_keywords(data_path))
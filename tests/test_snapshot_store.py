@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import snapshot_store as ss
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def snapshot_frame(rows):
+    return pd.DataFrame(rows, columns=['keyword', 'search_intent', 'avg_monthly_searches', 'cpc'])
+
+
+def test_diff_new_dropped_and_changed(tmp_path):
+    history = str(tmp_path)
+    old = snapshot_frame([
+        ('vfx studio', 'transactional', 1600.0, 3.75),
+        ('motion graphics', 'commercial', 900.0, np.nan),
+        ('compositing', 'informational', 500.0, np.nan),
+        ('dropped keyword', 'informational', 10.0, 1.0),
+        ('same keyword', 'commercial', 20.0, 2.0),
+    ])
+    new = snapshot_frame([
+        # Same keyword after normalization, different volume
+        (' VFX Studio', 'transactional', 1900.0, 3.75),
+        # NaN on one side is a change, NaN on both sides is not
+        ('motion graphics', 'commercial', 900.0, 4.5),
+        ('compositing', 'informational', 500.0, np.nan),
+        ('same keyword', 'commercial', 20.0, 2.0),
+        ('new keyword', 'commercial', 30.0, 5.0),
+    ])
+    ss.append_snapshot(old, '2025-04-15', history)
+    ss.append_snapshot(new, '2025-05-15', history)
+    assert ss.list_snapshots(history) == ['2025-04-15', '2025-05-15']
+
+    changes = ss.diff_snapshots('2025-04-15', '2025-05-15', history)
+    assert changes['new']['keyword'].tolist() == ['new keyword']
+    assert changes['dropped']['keyword'].tolist() == ['dropped keyword']
+
+    changed = changes['changed'].set_index('keyword')
+    assert sorted(changed.index) == [' VFX Studio', 'motion graphics']
+    assert changed.loc[' VFX Studio', 'avg_monthly_searches_delta'] == 300.0
+    assert np.isnan(changed.loc['motion graphics', 'cpc_old'])
+    assert changed.loc['motion graphics', 'cpc_new'] == 4.5
+
+
+def test_snapshot_is_sorted_by_unique_keyword_hash(tmp_path):
+    df = snapshot_frame([('b', 'commercial', 1.0, 1.0), ('a', 'commercial', 2.0, 2.0), ('B ', 'commercial', 3.0, 3.0)])
+    ss.append_snapshot(df, '2025-05-15', str(tmp_path))
+    stored = ss.read_snapshot('2025-05-15', history_dir=str(tmp_path))
+    hashes = stored['keyword_hash'].to_numpy()
+    assert len(stored) == 2
+    assert (hashes[1:] > hashes[:-1]).all()
+    # The first copy of a duplicate keyword is kept
+    assert stored.set_index('keyword').loc['b', 'cpc'] == 1.0
+
+
+def test_append_existing_date_raises(tmp_path):
+    df = snapshot_frame([('vfx studio', 'transactional', 1600.0, 3.75)])
+    path = ss.append_snapshot(df, '2025-05-15', str(tmp_path))
+    with pytest.raises(FileExistsError):
+        ss.append_snapshot(df.assign(cpc=9.0), '2025-05-15', str(tmp_path))
+    assert pd.read_parquet(path)['cpc'].tolist() == [3.75]
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_read_export_date_from_utf16_preamble(tmp_path):
+    assert ss.read_export_date(os.path.join(REPO_DIR, 'vfx-keyword-list.csv')) == '2025-05-15'
+    utf8 = tmp_path / 'export.csv'
+    utf8.write_text('Keyword Stats 2024-12-01 at 10_00_00\nKeyword,Currency\n', encoding='utf-8')
+    assert ss.read_export_date(str(utf8)) == '2024-12-01'
+    no_preamble = tmp_path / 'plain.csv'
+    no_preamble.write_text('Keyword,Currency\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        ss.read_export_date(str(no_preamble))
@@ -1,11 +1,16 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import re
-from io import BytesIO
+
+import keyword_analytics as ka
+import keyword_cube as kc
+import currency_normalization as cn
+import quantile_sketch as qs
+from dataset_watcher import DatasetWatcher
+import snapshot_store as ss
+import portfolio_optimizer as po
 
 # Set page configuration
 st.set_page_config(
@@ -64,11 +69,55 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load data
+# Load data: one watcher per server process reloads the CSV (and rebuilds its cube) in the
+# background when the pipeline rewrites it, so no session pays for the reload
+@st.cache_resource
+def get_dataset_watcher():
+    return DatasetWatcher(ka.DATA_FILE).start()
+
+def load_dataset():
+    return get_dataset_watcher().current()
+
+# CPC columns are cached as arrays once per dataset version; switching the display currency
+# re-scales them (and rebuilds the cube and sketches over the rescaled frame) without reloading
+@st.cache_resource(max_entries=4)
+def get_currency_scaler(dataset_version, _df):
+    return cn.load_currency_scaler(_df)
+
+@st.cache_resource(max_entries=8)
+def get_currency_dataset(dataset_version, currency, _dataset, _scaler):
+    df = _scaler.rescale(_dataset.df, currency)
+    return _dataset._replace(df=df, cube=kc.build_cube(df), sketches=qs.build_sketches(df))
+
+# Snapshots are append-only, so a diff between two export dates never goes stale
 @st.cache_data
-def load_data():
-    df = pd.read_csv("keywords_with_intent.csv")
-    return df
+def load_snapshot_diff(old_date, new_date):
+    return ss.diff_snapshots(old_date, new_date)
+
+# The ratio ordering only depends on the candidate pool, so moving the budget slider re-solves
+# against the cached solver instead of re-sorting. A currency switch keeps the dataset version,
+# so the display currency is part of the key.
+@st.cache_resource(max_entries=16)
+def get_portfolio_solver(dataset_version, display_currency, filter_key, objective, cost_basis, ctr, penalty, max_competition, _filtered_df):
+    candidates = po.candidate_frame(_filtered_df, objective, cost_basis, ctr, penalty, max_competition)
+    return po.GreedySolver(candidates)
+
+# Range slider over percentiles of a column (from its quantile sketch), so heavy-tailed columns
+# are not squeezed into the first few pixels. 0 and 100 map to the exact column min/max.
+def range_slider(label, sketch, min_value, max_value, quantile_scaled):
+    if not quantile_scaled:
+        return st.sidebar.slider(label, min_value, max_value, (min_value, max_value))
+    
+    low_pct, high_pct = st.sidebar.slider(f'{label} (percentile)', 0, 100, (0, 100))
+    low = min_value if low_pct == 0 else sketch.quantile(low_pct / 100)
+    high = max_value if high_pct == 100 else sketch.quantile(high_pct / 100)
+    if isinstance(min_value, int):
+        low, high = int(np.floor(low)), int(np.ceil(high))
+        st.sidebar.caption(f'{low:,} to {high:,}')
+    else:
+        low, high = float(low), float(high)
+        st.sidebar.caption(f'{low:,.2f} to {high:,.2f}')
+    return (low, high)
 
 # Function to generate downloadable link
 def get_download_link(df, filename, link_text):
@@ -79,11 +128,7 @@ def get_download_link(df, filename, link_text):
 
 # Function to convert dataframe to Excel
 def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Keywords')
-    processed_data = output.getvalue()
-    return processed_data
+    return ka.to_excel(df)
 
 # Main app
 def main():
@@ -99,7 +144,9 @@ def main():
     
     # Load data
     try:
-        df = load_data()
+        # Take the current version once so the whole rerun sees a consistent dataset
+        dataset = load_dataset()
+        df = dataset.df
         st.success(f"Successfully loaded {len(df)} keywords with search intent classification.")
     except Exception as e:
         st.error(f"Error loading data: {e}")
@@ -108,45 +155,62 @@ def main():
     # Sidebar filters
     st.sidebar.markdown("## Filters")
     
+    # Display currency (only offered when a local FX table is available)
+    money_format = '${:,.2f}'
+    display_currency = '$'
+    scaler = get_currency_scaler(dataset.version, df)
+    if scaler is not None:
+        currencies = scaler.currencies()
+        native = scaler.native_currency()
+        currency = st.sidebar.selectbox('Currency', currencies, index=currencies.index(native) if native in currencies else 0)
+        if currency != native:
+            dataset = get_currency_dataset(dataset.version, currency, dataset, scaler)
+            df = dataset.df
+        money_format = '{:,.2f} ' + currency
+        display_currency = currency
+    
+    options = ka.filter_options(df)
+    
     # Intent filter
-    intent_options = ['All'] + sorted(df['search_intent'].unique().tolist())
+    intent_options = ['All'] + options['intents']
     selected_intent = st.sidebar.selectbox('Search Intent', intent_options)
     
+    quantile_scaled = st.sidebar.checkbox('Quantile-scaled sliders', value=True)
+    sketches = dataset.sketches
+    
     # Volume range filter
-    min_volume = int(df['avg_monthly_searches'].min())
-    max_volume = int(df['avg_monthly_searches'].max())
-    volume_range = st.sidebar.slider('Monthly Search Volume', min_volume, max_volume, (min_volume, max_volume))
+    min_volume, max_volume = options['volume_range']
+    volume_range = range_slider('Monthly Search Volume', sketches['avg_monthly_searches'], min_volume, max_volume, quantile_scaled)
     
     # CPC range filter
-    min_cpc = float(df['cpc'].min())
-    max_cpc = float(df['cpc'].max())
-    cpc_range = st.sidebar.slider('Cost Per Click (CPC)', min_cpc, max_cpc, (min_cpc, max_cpc))
+    min_cpc, max_cpc = options['cpc_range']
+    cpc_range = range_slider('Cost Per Click (CPC)', sketches['cpc'], min_cpc, max_cpc, quantile_scaled)
     
     # Competition score filter
-    min_comp = float(df['competition_score'].min())
-    max_comp = float(df['competition_score'].max())
-    competition_range = st.sidebar.slider('Competition Score', min_comp, max_comp, (min_comp, max_comp))
+    min_comp, max_comp = options['competition_range']
+    competition_range = range_slider('Competition Score', sketches['competition_score'], min_comp, max_comp, quantile_scaled)
     
     # Keyword text filter
     keyword_filter = st.sidebar.text_input('Keyword Contains')
     
-    # Apply filters
-    filtered_df = df.copy()
-    
-    if selected_intent != 'All':
-        filtered_df = filtered_df[filtered_df['search_intent'] == selected_intent]
+    # Distributions of the full dataset, straight from the sketches (up to the 99th percentile)
+    with st.sidebar.expander('Distributions'):
+        for label, column in [('Monthly Search Volume', 'avg_monthly_searches'), ('CPC', 'cpc'), ('Competition Score', 'competition_score')]:
+            st.caption(label)
+            st.bar_chart(ka.sketch_histogram(sketches[column]), height=150)
     
-    filtered_df = filtered_df[
-        (filtered_df['avg_monthly_searches'] >= volume_range[0]) & 
-        (filtered_df['avg_monthly_searches'] <= volume_range[1]) &
-        (filtered_df['cpc'] >= cpc_range[0]) & 
-        (filtered_df['cpc'] <= cpc_range[1]) &
-        (filtered_df['competition_score'] >= competition_range[0]) & 
-        (filtered_df['competition_score'] <= competition_range[1])
-    ]
+    # Apply filters
+    filters = dict(
+        intent=selected_intent,
+        volume_range=volume_range,
+        cpc_range=cpc_range,
+        competition_range=competition_range,
+        keyword_contains=keyword_filter
+    )
+    filtered_df = ka.filter_keywords(df, **filters)
     
-    if keyword_filter:
-        filtered_df = filtered_df[filtered_df['keyword'].str.contains(keyword_filter, case=False)]
+    # Aggregates come from the cube unless a slider boundary splits a bucket (or text filter is set)
+    cube_view = dataset.cube.query(**filters)
     
     # Display filter summary
     st.markdown('<div class="subsection-header">Filter Summary</div>', unsafe_allow_html=True)
@@ -156,6 +220,7 @@ def main():
     st.markdown('<div class="section-header">Summary Metrics</div>', unsafe_allow_html=True)
     
     # Create metrics in columns
+    metrics = kc.summary_metrics(cube_view) if cube_view is not None else ka.summary_metrics(filtered_df)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -164,10 +229,10 @@ def main():
             <div class="metric-label">Total Keywords</div>
             <div class="metric-value">{:,}</div>
         </div>
-        """.format(len(filtered_df)), unsafe_allow_html=True)
+        """.format(metrics['total_keywords']), unsafe_allow_html=True)
     
     with col2:
-        avg_volume = filtered_df['avg_monthly_searches'].mean()
+        avg_volume = metrics['avg_volume']
         st.markdown("""
         <div class="metric-card">
             <div class="metric-label">Avg. Monthly Searches</div>
@@ -176,16 +241,16 @@ def main():
         """.format(avg_volume), unsafe_allow_html=True)
     
     with col3:
-        avg_cpc = filtered_df['cpc'].mean()
+        avg_cpc = metrics['avg_cpc']
         st.markdown("""
         <div class="metric-card">
             <div class="metric-label">Avg. CPC</div>
-            <div class="metric-value">${:,.2f}</div>
+            <div class="metric-value">{}</div>
         </div>
-        """.format(avg_cpc), unsafe_allow_html=True)
+        """.format(money_format.format(avg_cpc)), unsafe_allow_html=True)
     
     with col4:
-        avg_competition = filtered_df['competition_score'].mean()
+        avg_competition = metrics['avg_competition']
         st.markdown("""
         <div class="metric-card">
             <div class="metric-label">Avg. Competition Score</div>
@@ -196,25 +261,12 @@ def main():
     # Intent breakdown
     st.markdown('<div class="subsection-header">Intent Breakdown</div>', unsafe_allow_html=True)
     
-    intent_counts = filtered_df['search_intent'].value_counts().reset_index()
-    intent_counts.columns = ['Intent', 'Count']
-    
-    # Intent metrics by row
-    intent_metrics = filtered_df.groupby('search_intent').agg({
-        'avg_monthly_searches': 'mean',
-        'cpc': 'mean',
-        'competition_score': 'mean'
-    }).reset_index()
-    
-    intent_metrics.columns = ['Intent', 'Avg. Monthly Searches', 'Avg. CPC', 'Avg. Competition']
-    
-    # Merge the two dataframes
-    intent_summary = pd.merge(intent_counts, intent_metrics, on='Intent')
+    intent_summary = kc.intent_summary(cube_view) if cube_view is not None else ka.intent_summary(filtered_df)
     
     # Display the intent summary
     st.dataframe(intent_summary.style.format({
         'Avg. Monthly Searches': '{:,.1f}',
-        'Avg. CPC': '${:,.2f}',
+        'Avg. CPC': money_format,
         'Avg. Competition': '{:,.1f}'
     }))
     
@@ -222,19 +274,12 @@ def main():
     st.markdown('<div class="section-header">Visual Charts</div>', unsafe_allow_html=True)
     
     # Create tabs for different visualizations
-    tab1, tab2, tab3, tab4 = st.tabs(["Volume by Intent", "CPC vs Volume", "Keyword Clusters", "Top Keywords"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Volume by Intent", "CPC vs Volume", "Keyword Clusters", "Top Keywords", "Portfolio Optimizer"])
     
     with tab1:
         # Bar chart of total monthly volume by intent
-        intent_volume = filtered_df.groupby('search_intent')['avg_monthly_searches'].sum().reset_index()
-        fig1 = px.bar(
-            intent_volume, 
-            x='search_intent', 
-            y='avg_monthly_searches',
-            color='search_intent',
-            labels={'search_intent': 'Search Intent', 'avg_monthly_searches': 'Total Monthly Search Volume'},
-            title='Total Monthly Search Volume by Intent'
-        )
+        intent_volume = kc.intent_volume(cube_view) if cube_view is not None else ka.intent_volume(filtered_df)
+        fig1 = ka.volume_by_intent_figure(intent_volume)
         st.plotly_chart(fig1, use_container_width=True)
         
         st.markdown("""
@@ -246,21 +291,7 @@ def main():
     
     with tab2:
         # Scatter plot of CPC vs. search volume, colored by competition score
-        fig2 = px.scatter(
-            filtered_df, 
-            x='avg_monthly_searches', 
-            y='cpc',
-            color='competition_score',
-            size='avg_monthly_searches',
-            hover_name='keyword',
-            color_continuous_scale='Viridis',
-            labels={
-                'avg_monthly_searches': 'Average Monthly Searches',
-                'cpc': 'Cost Per Click ($)',
-                'competition_score': 'Competition Score'
-            },
-            title='CPC vs. Search Volume (colored by Competition Score)'
-        )
+        fig2 = ka.cpc_vs_volume_figure(filtered_df, display_currency)
         st.plotly_chart(fig2, use_container_width=True)
         
         st.markdown("""
@@ -271,30 +302,11 @@ def main():
         """, unsafe_allow_html=True)
     
     with tab3:
-        # Extract keyword clusters based on common terms
-        def extract_main_terms(keyword):
-            # Remove common words and keep main terms
-            common_words = ['and', 'the', 'for', 'with', 'in', 'on', 'of', 'to', 'a']
-            terms = keyword.lower().split()
-            return ' '.join([term for term in terms if term not in common_words and len(term) > 2])
-        
-        filtered_df['main_terms'] = filtered_df['keyword'].apply(extract_main_terms)
-        
-        # Get the most common terms
-        all_terms = ' '.join(filtered_df['main_terms']).split()
-        term_counts = pd.Series(all_terms).value_counts().head(20)
+        # Keyword clusters based on common terms (main terms are precomputed at load)
+        term_df = ka.term_clusters(filtered_df)
         
         # Create a treemap of keyword clusters
-        term_df = pd.DataFrame({'term': term_counts.index, 'count': term_counts.values})
-        
-        fig3 = px.treemap(
-            term_df,
-            path=['term'],
-            values='count',
-            color='count',
-            color_continuous_scale='RdBu',
-            title='Keyword Clusters by Common Terms'
-        )
+        fig3 = ka.term_clusters_figure(term_df)
         st.plotly_chart(fig3, use_container_width=True)
         
         st.markdown("""
@@ -303,23 +315,31 @@ def main():
         Larger blocks represent more frequently occurring terms that could form the basis of content themes.
         </div>
         """, unsafe_allow_html=True)
+        
+        # Semantic clusters from keyword_clusters.py group related phrasings the term counts miss
+        if 'semantic_cluster' in filtered_df.columns and len(filtered_df):
+            cluster_df = ka.semantic_cluster_summary(filtered_df)
+            fig_clusters = ka.semantic_clusters_figure(cluster_df)
+            st.plotly_chart(fig_clusters, use_container_width=True)
+            st.dataframe(cluster_df.style.format({
+                'total_monthly_searches': '{:,.0f}',
+                'avg_cpc': money_format,
+                'avg_competition': '{:,.1f}'
+            }))
     
     with tab4:
         # Top 20 high-volume/high-CPC keywords
         st.markdown('<div class="subsection-header">Top 20 High-Value Keywords</div>', unsafe_allow_html=True)
         
-        # Create a value score (volume * CPC)
-        filtered_df['value_score'] = filtered_df['avg_monthly_searches'] * filtered_df['cpc']
-        
-        # Get top 20 by value score
-        top_keywords = filtered_df.sort_values('value_score', ascending=False).head(20)
+        # Get top 20 by value score (volume * CPC, precomputed at load)
+        top_keywords = ka.top_keywords(filtered_df, 20)
         
         # Display as a table
         st.dataframe(
-            top_keywords[['keyword', 'search_intent', 'avg_monthly_searches', 'cpc', 'competition_score', 'value_score']]
+            top_keywords[ka.TOP_KEYWORD_COLUMNS]
             .style.format({
                 'avg_monthly_searches': '{:,.0f}',
-                'cpc': '${:,.2f}',
+                'cpc': money_format,
                 'competition_score': '{:,.1f}',
                 'value_score': '{:,.0f}'
             })
@@ -332,37 +352,113 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    with tab5:
+        st.markdown('<div class="subsection-header">Budget-Constrained Keyword Portfolio</div>', unsafe_allow_html=True)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            objective = st.radio('Maximize', po.OBJECTIVES, format_func=lambda o: 'Expected clicks' if o == 'clicks' else 'Click value (clicks x CPC)')
+            cost_basis = st.selectbox('Cost per click', list(po.COST_BASIS_COLUMNS), index=2,
+                                      format_func=lambda b: {'low': 'Low bid', 'mid': 'Mid (avg. CPC)', 'high': 'High bid'}[b])
+        with col2:
+            ctr = st.number_input('Expected CTR', min_value=0.001, max_value=1.0, value=po.DEFAULT_CTR, step=0.005, format='%.3f')
+            penalty = st.slider('Competition penalty', 0.0, 1.0, 0.5, help='Share of value lost at competition score 100')
+        with col3:
+            max_competition = st.slider('Max competition score', 0, 100, 100)
+            exact = st.checkbox('Exact solver (slower)', value=False)
+        
+        intent_caps = {}
+        with st.expander('Per-intent budget caps'):
+            for intent in options['intents']:
+                share = st.slider(f'Max share for {intent}', 0, 100, 100, format='%d%%', key=f'intent_cap_{intent}')
+                if share < 100:
+                    intent_caps[intent] = share / 100
+        
+        solver = get_portfolio_solver(dataset.version, display_currency, repr(filters), objective, cost_basis, ctr,
+                                      penalty, max_competition, filtered_df)
+        max_budget = float(np.ceil(solver.cum_cost[-1])) if len(solver.cum_cost) else 0.0
+        
+        if max_budget <= 0:
+            st.info('No keywords in the current filter have both a search volume and a CPC to optimize over.')
+        else:
+            budget = st.slider('Monthly budget', 0.0, max_budget, float(min(max_budget, round(max_budget / 10))))
+            portfolio = po.solve_exact(solver, budget, intent_caps) if exact else solver.solve(budget, intent_caps)
+            
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric('Keywords Selected', f'{len(portfolio.selected):,}')
+            col2.metric('Monthly Spend', money_format.format(portfolio.spend))
+            col3.metric('Expected Clicks', f'{portfolio.clicks:,.1f}')
+            col4.metric('Expected Value', f'{portfolio.value:,.1f}')
+            
+            st.dataframe(portfolio.selected.style.format({
+                'avg_monthly_searches': '{:,.0f}',
+                'cpc': money_format,
+                'competition_score': '{:,.1f}',
+                'expected_clicks': '{:,.1f}',
+                'monthly_cost': money_format,
+                'expected_value': '{:,.1f}'
+            }))
+            
+            st.download_button(
+                label="Download portfolio as CSV",
+                data=portfolio.selected.to_csv(index=False).encode('utf-8'),
+                file_name="vfx_keyword_portfolio.csv",
+                mime="text/csv"
+            )
+        
+        st.markdown("""
+        <div class="highlight">
+        <strong>Insight:</strong> The optimizer picks the keywords with the best expected return per dollar until the budget is spent.
+        Use the high bid as cost for a conservative plan, and per-intent caps to keep spend balanced across the funnel.
+        </div>
+        """, unsafe_allow_html=True)
+    
     # Data Table Section
     st.markdown('<div class="section-header">Keyword Data Table</div>', unsafe_allow_html=True)
     
     # Sorting options
-    sort_options = {
-        'Keyword (A-Z)': ('keyword', False),
-        'Keyword (Z-A)': ('keyword', True),
-        'Highest Search Volume': ('avg_monthly_searches', True),
-        'Lowest Search Volume': ('avg_monthly_searches', False),
-        'Highest CPC': ('cpc', True),
-        'Lowest CPC': ('cpc', False),
-        'Highest Competition': ('competition_score', True),
-        'Lowest Competition': ('competition_score', False)
-    }
-    
-    sort_by = st.selectbox('Sort by', list(sort_options.keys()))
-    sort_col, sort_ascending = sort_options[sort_by]
+    sort_by = st.selectbox('Sort by', list(ka.SORT_OPTIONS.keys()))
     
     # Sort the dataframe
-    sorted_df = filtered_df.sort_values(by=sort_col, ascending=sort_ascending)
+    sorted_df = ka.sort_keywords(filtered_df, sort_by)
     
     # Display the dataframe
     st.dataframe(
-        sorted_df[['keyword', 'search_intent', 'avg_monthly_searches', 'cpc', 'competition_score', 'competition_text']]
+        sorted_df[ka.TABLE_COLUMNS]
         .style.format({
             'avg_monthly_searches': '{:,.0f}',
-            'cpc': '${:,.2f}',
+            'cpc': money_format,
             'competition_score': '{:,.1f}'
         })
     )
     
+    # Changes Since Section (only once the history store holds at least two exports)
+    snapshot_dates = ss.list_snapshots()
+    if len(snapshot_dates) >= 2:
+        st.markdown('<div class="section-header">Changes Since</div>', unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            old_date = st.selectbox('Changes since export', snapshot_dates[:-1], index=len(snapshot_dates) - 2)
+        with col2:
+            newer_dates = [d for d in snapshot_dates if d > old_date]
+            new_date = st.selectbox('Compared to export', newer_dates, index=len(newer_dates) - 1)
+        
+        changes = load_snapshot_diff(old_date, new_date)
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric('New Keywords', len(changes['new']))
+        col2.metric('Dropped Keywords', len(changes['dropped']))
+        col3.metric('Changed Keywords', len(changes['changed']))
+        
+        new_tab, dropped_tab, changed_tab = st.tabs(["New", "Dropped", "Changed"])
+        with new_tab:
+            st.dataframe(changes['new'])
+        with dropped_tab:
+            st.dataframe(changes['dropped'])
+        with changed_tab:
+            st.dataframe(changes['changed'].sort_values('cpc_delta', key=abs, ascending=False))
+    
     # Export Section
     st.markdown('<div class="section-header">Export Data</div>', unsafe_allow_html=True)
     